@@ -11,6 +11,11 @@ from starlette.middleware.cors import CORSMiddleware
 from .config import settings
 from .routes import main_router
 from .services.connection_manager import ConnectionManager
+from .services.game_scheduler import game_scheduler
+from .services.http_client import http_client
+from .services.question_pool import question_pool
+from .services.repository import repository
+from .services.token_cache import token_cache
 
 
 def read(*paths, **kwargs):
@@ -66,6 +71,29 @@ if settings.server:
         allow_headers=settings.get("server.cors_allow_headers", ["*"]),
     )
 
+
+@app.on_event("startup")
+def startup() -> None:
+    """
+    Open the shared resources and start the background tasks of the
+    application services.
+    """
+    http_client.start()
+    token_cache.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    """
+    Release the resources held by the application services.
+    """
+    await game_scheduler.stop()
+    await token_cache.stop()
+    await question_pool.stop()
+    await http_client.stop()
+    repository.shutdown()
+
+
 # Main router for the API.
 app.include_router(main_router)
 
@@ -1,3 +1,6 @@
+import asyncio
+from typing import Optional
+
 import typer
 import uvicorn
 
@@ -6,14 +9,17 @@ from .config import settings
 cli = typer.Typer(name="project_name API")
 
 
-@cli.command()
+@cli.callback(invoke_without_command=True)
 def run(
+    ctx: typer.Context,
     port: int = settings.server.port,
     host: str = settings.server.host,
     log_level: str = settings.server.log_level,
     reload: bool = settings.server.reload,
 ):
     """Run the API server."""
+    if ctx.invoked_subcommand is not None:
+        return
     uvicorn.run(
         "api.app:app",
         host=host,
@@ -21,3 +27,51 @@ def run(
         log_level=log_level,
         reload=reload,
     )
+
+
+@cli.command()
+def reindex():
+    """Rebuild the database indexes from the stored records."""
+    from .services.repository import repository
+
+    asyncio.run(repository.reindex())
+    repository.shutdown()
+
+
+@cli.command("fake-quiz-api")
+def fake_quiz_api(
+    port: int = 8001,
+    host: str = settings.server.host,
+    latency: float = typer.Option(0.0, help="Mean latency in milliseconds."),
+    jitter: float = typer.Option(
+        0.0, help="Spread of the latency in milliseconds."
+    ),
+    distribution: str = typer.Option(
+        "fixed",
+        help="Latency distribution: fixed, uniform, normal, exponential.",
+    ),
+    error_rate: float = typer.Option(
+        0.0, help="Share of the requests answered with 500."
+    ),
+    payload_size: int = typer.Option(
+        0, help="Extra bytes added to every question."
+    ),
+    seed: Optional[int] = typer.Option(
+        None, help="Seed of the random generator."
+    ),
+):
+    """Run a fake quiz api with injected latency, errors and payloads."""
+    from .fake_quiz_api import create_app
+
+    try:
+        app = create_app(
+            latency=latency / 1000,
+            jitter=jitter / 1000,
+            distribution=distribution,
+            error_rate=error_rate,
+            payload_size=payload_size,
+            seed=seed,
+        )
+    except ValueError as err:
+        raise typer.BadParameter(str(err))
+    uvicorn.run(app, host=host, port=port, log_level="warning")
@@ -8,3 +8,4 @@ class Tags(Enum):
 
     quizzes = "Quizzes"
     users = "Users"
+    metrics = "Metrics"
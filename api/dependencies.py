@@ -2,10 +2,11 @@ from typing import Any, Dict
 
 from fastapi import Depends, HTTPException, Response, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from firebase_admin import auth
 
+from .services.token_cache import token_cache
 
-def get_user_token(
+
+async def get_user_token(
     res: Response,
     credential: HTTPAuthorizationCredentials = Depends(
         HTTPBearer(auto_error=False)
@@ -13,6 +14,7 @@ def get_user_token(
 ) -> Dict[str, Any]:
     """
     Take the input credentials and verify them with Firebase. If they are valid, return the decoded token.
+    Verified tokens are cached until they expire.
     :param res: - the response object
     :param credential: - the credentials
     :return: The decoded token
@@ -24,7 +26,7 @@ def get_user_token(
             headers={"WWW-Authenticate": 'Bearer realm="auth_required"'},
         )
     try:
-        decoded_token = auth.verify_id_token(credential.credentials)
+        decoded_token = await token_cache.verify(credential.credentials)
     except Exception as err:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
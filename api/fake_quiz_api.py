@@ -0,0 +1,178 @@
+"""
+Stand-in for the upstream quiz api, serving the categories, tags and
+questions endpoints with injected latency, errors and payload size, so the
+upstream paths can be load tested offline and reproducibly.
+
+    contentapi fake-quiz-api --port 8001 --latency 120 --jitter 40
+    CONTENTAPI_SERVER__QUIZ_API=http://127.0.0.1:8001/api contentapi
+"""
+
+import asyncio
+from random import Random
+from typing import Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+DISTRIBUTIONS = ("fixed", "uniform", "normal", "exponential")
+
+CATEGORIES: Dict[str, List[str]] = {
+    "Arts & Literature": ["arts_and_literature", "arts", "literature"],
+    "Film & TV": ["film_and_tv", "film", "tv"],
+    "Food & Drink": ["food_and_drink", "food", "drink"],
+    "General Knowledge": ["general_knowledge"],
+    "Geography": ["geography"],
+    "History": ["history"],
+    "Music": ["music"],
+    "Science": ["science"],
+    "Society & Culture": ["society_and_culture", "society", "culture"],
+    "Sport & Leisure": ["sport_and_leisure", "sport", "leisure"],
+}
+
+TAGS = ["acting", "alcohol", "animals", "art", "books", "wine", "young_adult"]
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+class FakeQuizApi:
+    """
+    Fake quiz api with the injected faults.
+    :param latency: - the mean response latency in seconds
+    :param jitter: - the spread of the latency in seconds
+    :param distribution: - the latency distribution, one of DISTRIBUTIONS
+    :param error_rate: - the share of requests answered with 500
+    :param payload_size: - the extra bytes added to every question
+    :param seed: - the seed of the random generator, for reproducible runs
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        distribution: str = "fixed",
+        error_rate: float = 0.0,
+        payload_size: int = 0,
+        seed: Optional[int] = None,
+    ):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution {distribution}")
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.payload_size = payload_size
+        self.random = Random(seed)
+        self.requests = 0
+
+    def delay(self) -> float:
+        """
+        Draw the latency of the next response.
+        :return: the latency in seconds
+        """
+        if self.distribution == "uniform":
+            delay = self.random.uniform(
+                self.latency - self.jitter, self.latency + self.jitter
+            )
+        elif self.distribution == "normal":
+            delay = self.random.gauss(self.latency, self.jitter)
+        elif self.distribution == "exponential":
+            delay = (
+                self.random.expovariate(1 / self.latency)
+                if self.latency > 0
+                else 0.0
+            )
+        else:
+            delay = self.latency
+        return max(delay, 0.0)
+
+    def question(self, number: int, category: str, difficulty: str) -> Dict:
+        """
+        Build a question in the format of the quiz api.
+        :param number: - the number of the question
+        :param category: - the category slug
+        :param difficulty: - the difficulty
+        :return: the question
+        """
+        question = {
+            "id": f"fake-{self.requests}-{number}",
+            "category": category,
+            "difficulty": difficulty,
+            "question": f"Fake question {number} about {category}?",
+            "correctAnswer": "Correct",
+            "incorrectAnswers": ["Wrong 1", "Wrong 2", "Wrong 3"],
+            "tags": [],
+            "type": "Multiple Choice",
+            "regions": [],
+            "isNiche": False,
+        }
+        if self.payload_size > 0:
+            question["padding"] = "x" * self.payload_size
+        return question
+
+    async def respond(self, content) -> JSONResponse:
+        """
+        Answer after the injected latency, or fail at the error rate.
+        :param content: - the JSON content
+        :return: the response
+        """
+        self.requests += 1
+        await asyncio.sleep(self.delay())
+        if self.random.random() < self.error_rate:
+            return JSONResponse({"error": "Injected error"}, status_code=500)
+        return JSONResponse(content)
+
+    async def categories(self, request: Request) -> JSONResponse:
+        """
+        Get the categories and their slugs.
+        """
+        return await self.respond(CATEGORIES)
+
+    async def tags(self, request: Request) -> JSONResponse:
+        """
+        Get the tags.
+        """
+        return await self.respond(TAGS)
+
+    async def questions(self, request: Request) -> JSONResponse:
+        """
+        Get the questions for the limit, categories and difficulty.
+        """
+        params = request.query_params
+        try:
+            limit = min(max(int(params.get("limit", 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        categories = [
+            c for c in params.get("categories", "").split(",") if c
+        ] or ["general_knowledge"]
+        difficulty = params.get("difficulty")
+        return await self.respond(
+            [
+                self.question(
+                    number,
+                    categories[number % len(categories)],
+                    difficulty or DIFFICULTIES[number % len(DIFFICULTIES)],
+                )
+                for number in range(limit)
+            ]
+        )
+
+
+def create_app(**kwargs) -> Starlette:
+    """
+    Create the ASGI app of the fake quiz api.
+    :param kwargs: - the arguments of FakeQuizApi
+    :return: the app
+    """
+    fake = FakeQuizApi(**kwargs)
+    app = Starlette(
+        routes=[
+            Route("/api/categories", fake.categories),
+            Route("/api/tags", fake.tags),
+            Route("/api/questions", fake.questions),
+        ]
+    )
+    app.state.fake = fake
+    return app
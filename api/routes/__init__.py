@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from ..constants.tags import Tags
+from .metrics import router as metrics_router
 from .quizzes import router as quizzes_router
 from .users import router as users_router
 
@@ -28,3 +29,14 @@ Include the users router in the main router. This is used to create a new user a
 :param tags: - the tags for the users router
 """
 main_router.include_router(users_router, prefix="/users", tags=[Tags.users])
+
+"""
+Include the metrics router in the main router. This is used to read the
+counters of the in-memory caches.
+:param metrics_router: - the metrics router
+:param prefix: - the prefix for the metrics router
+:param tags: - the tags for the metrics router
+"""
+main_router.include_router(
+    metrics_router, prefix="/metrics", tags=[Tags.metrics]
+)
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from ..services.game_scheduler import game_scheduler
+from ..services.question_pool import question_pool
+from ..services.quiz_api import quiz_api
+from ..services.repository import repository
+from ..services.response_cache import response_cache
+from ..services.token_cache import token_cache
+from ..services.upstream_cache import upstream_cache
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Successful Response",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "tokens": {
+                            "size": 12,
+                            "hits": 340,
+                            "misses": 14,
+                            "verifications": 14,
+                            "revocation_checks": 0,
+                            "failures": 2,
+                        },
+                        "users": {"size": 12, "hits": 298, "misses": 12},
+                        "responses": {"size": 9, "hits": 120, "misses": 9},
+                        "questions": {
+                            "size": 3,
+                            "batches": 6,
+                            "hits": 41,
+                            "misses": 3,
+                            "coalesced": 5,
+                            "failures": 0,
+                        },
+                        "quiz_api": {
+                            "state": "closed",
+                            "failure_rate": 0.05,
+                            "opens": 1,
+                            "rejected": 37,
+                            "hedge_delay": 0.35,
+                            "hedges": 4,
+                            "hedge_wins": 3,
+                        },
+                        "upstream": {
+                            "size": 2,
+                            "hits": 512,
+                            "stale_hits": 3,
+                            "misses": 2,
+                            "refreshes": 5,
+                            "failures": 1,
+                        },
+                        "games": {"timers": 48, "running": 2, "fired": 9120},
+                    }
+                }
+            },
+        }
+    },
+)
+async def get_metrics():
+    """
+    Get the counters of the in-memory caches.
+    """
+    return JSONResponse(
+        content={
+            "tokens": token_cache.stats(),
+            "users": repository.users.stats(),
+            "responses": response_cache.entries.stats(),
+            "questions": question_pool.stats(),
+            "quiz_api": quiz_api.stats(),
+            "upstream": upstream_cache.stats(),
+            "games": game_scheduler.stats(),
+        }
+    )
@@ -1,25 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+import httpx
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    status,
+)
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse, Response
-from firebase_admin import db
-from firebase_admin.exceptions import FirebaseError
-from requests import get
 
-from ..config import settings
 from ..dependencies import get_user_token
 from ..schemas.quizzes import (
     CategoriesModel,
     CreateUserQuiz,
+    DeletedUserQuizzes,
     DeleteUserQuizzes,
     TagsModel,
     UpdateUserQuiz,
     UserQuiz,
     UserQuizzes,
 )
+from ..services.quiz_api import QuizApiUnavailableError, quiz_api
+from ..services.repository import (
+    QuizModifiedError,
+    RepositoryError,
+    repository,
+)
+from ..services.response_cache import quizzes_key, response_cache
+from ..services.upstream_cache import upstream_cache
+from ..utils.etag import compute_etag, match_etag
+from ..utils.projection import SUMMARY_FIELDS, parse_fields, project_quiz
 
 router = APIRouter()
 
 
+async def fetch_categories() -> dict:
+    """
+    Fetch the categories from the quiz api.
+    """
+    result = await quiz_api.get("/categories")
+    result.raise_for_status()
+    return {"categories": list(result.json().keys())}
+
+
+async def fetch_tags() -> dict:
+    """
+    Fetch the tags from the quiz server.
+    """
+    result = await quiz_api.get("/tags")
+    result.raise_for_status()
+    return {"tags": list(result.json())}
+
+
 @router.get(
     "/categories",
     response_model=CategoriesModel,
@@ -34,21 +69,37 @@ router = APIRouter()
                 }
             },
         },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "Categories have not changed"
+        },
         status.HTTP_500_INTERNAL_SERVER_ERROR: {
             "description": "Something went wrong"
         },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Quiz service is unavailable"}
+                }
+            }
+        },
     },
 )
-async def get_categories():
+async def get_categories(if_none_match: Optional[str] = Header(default=None)):
     """
     Get the categories from the quiz api.
+    Served from the cache, which is refreshed in the background once stale.
+    Responds with 304 when the If-None-Match header holds the current ETag.
     """
-    result = get(f"{settings.server.quiz_api}/categories")
-    categories = list(result.json().keys())
-
-    return JSONResponse(
-        content=jsonable_encoder({"categories": categories}),
-    )
+    try:
+        cached = await upstream_cache.get("categories", fetch_categories)
+    except QuizApiUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Quiz service is unavailable",
+        )
+    except (httpx.HTTPError, ValueError):
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return cached.response(if_none_match)
 
 
 @router.get(
@@ -63,21 +114,35 @@ async def get_categories():
                 }
             },
         },
+        status.HTTP_304_NOT_MODIFIED: {"description": "Tags have not changed"},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {
             "description": "Something went wrong"
         },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Quiz service is unavailable"}
+                }
+            }
+        },
     },
 )
-async def get_tags():
+async def get_tags(if_none_match: Optional[str] = Header(default=None)):
     """
     Get the tags from the quiz server.
+    Served from the cache, which is refreshed in the background once stale.
+    Responds with 304 when the If-None-Match header holds the current ETag.
     """
-    result = get(f"{settings.server.quiz_api}/tags")
-    tags = list(result.json())
-
-    return JSONResponse(
-        content=jsonable_encoder({"tags": tags}),
-    )
+    try:
+        cached = await upstream_cache.get("tags", fetch_tags)
+    except QuizApiUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Quiz service is unavailable",
+        )
+    except (httpx.HTTPError, ValueError):
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return cached.response(if_none_match)
 
 
 @router.post(
@@ -142,24 +207,18 @@ async def post_user_quiz(body: CreateUserQuiz, user=Depends(get_user_token)):
     """
     userQuiz = UserQuiz(**{"uid": user["uid"], **body.dict()})
     try:
-        if (
-            db.reference("Users")
-            .order_by_child("uid")
-            .equal_to(userQuiz.uid)
-            .limit_to_first(1)
-            .get()
-            is None
-        ):
+        if await repository.get_user(userQuiz.uid) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User cannot be found",
             )
-        db.reference("Quizzes").push().set(userQuiz.dict())
+        await repository.create_quiz(userQuiz.dict())
+        response_cache.invalidate(quizzes_key(userQuiz.uid))
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
             content=jsonable_encoder(userQuiz),
         )
-    except FirebaseError:
+    except RepositoryError:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -203,6 +262,9 @@ async def post_user_quiz(body: CreateUserQuiz, user=Depends(get_user_token)):
                 }
             },
         },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "User quizzes have not changed"
+        },
         status.HTTP_401_UNAUTHORIZED: {
             "content": {
                 "application/json": {
@@ -220,31 +282,63 @@ async def post_user_quiz(body: CreateUserQuiz, user=Depends(get_user_token)):
         status.HTTP_500_INTERNAL_SERVER_ERROR: {},
     },
 )
-async def get_user_quizzes(user=Depends(get_user_token)):
+async def get_user_quizzes(
+    user=Depends(get_user_token),
+    limit: Optional[int] = Query(default=None, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, min_length=1),
+    fields: Optional[str] = Query(default=None, min_length=1),
+    if_none_match: Optional[str] = Header(default=None),
+):
     """
-    Get the user's quizzes from the database.
+    Get the user's quizzes from the database, ordered by quiz id.
+    With limit, at most that many quizzes are returned and the X-Next-Cursor
+    header holds the cursor of the next page. With fields, e.g.
+    title,category,difficulty,tags,questions_count, only those fields of the
+    quizzes are returned. Projections made only of summary fields, with
+    updated_at, are read from the compact user quiz index.
+    Responds with 304 when the If-None-Match header holds the current ETag.
     """
     try:
-        ref = db.reference("Users")
-        user_details = (
-            ref.order_by_child("uid")
-            .equal_to(user["uid"])
-            .limit_to_first(1)
-            .get()
+        projection = None if fields is None else parse_fields(fields)
+    except ValueError as err:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(err)
         )
-        if user_details is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User cannot be found",
+    variant = f"{limit}&{cursor}&{projection}"
+    cached = response_cache.get(quizzes_key(user["uid"]), variant)
+    if cached is None:
+        try:
+            if await repository.get_user(user["uid"]) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User cannot be found",
+                )
+            if projection is not None and set(projection) <= set(
+                SUMMARY_FIELDS
+            ):
+                get_quizzes = repository.get_quiz_summaries
+            else:
+                get_quizzes = repository.get_user_quizzes
+            user_quizzes = await get_quizzes(
+                user["uid"], None if limit is None else limit + 1, cursor
             )
-        else:
-            ref = db.reference("Quizzes")
-            user_quizzes = (
-                ref.order_by_child("uid").equal_to(user["uid"]).get()
+        except RepositoryError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-            return JSONResponse(content=jsonable_encoder(user_quizzes))
-    except FirebaseError:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        headers = None
+        if limit is not None and len(user_quizzes) > limit:
+            quiz_ids = list(user_quizzes)[:limit]
+            user_quizzes = {k: user_quizzes[k] for k in quiz_ids}
+            headers = {"X-Next-Cursor": quiz_ids[-1]}
+        if projection is not None:
+            user_quizzes = {
+                k: project_quiz(v, projection) for k, v in user_quizzes.items()
+            }
+        cached = response_cache.set(
+            quizzes_key(user["uid"]), user_quizzes, variant, headers
+        )
+    return cached.response(if_none_match)
 
 
 @router.get(
@@ -307,38 +401,41 @@ async def get_user_quiz(quiz_id: str, user=Depends(get_user_token)):
     Get user quiz.
     """
     try:
-        ref = db.reference("Users")
-        user_details = (
-            ref.order_by_child("uid")
-            .equal_to(user["uid"])
-            .limit_to_first(1)
-            .get()
-        )
-        if user_details is None:
+        if await repository.get_user(user["uid"]) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User cannot be found",
             )
-        ref = db.reference("Quizzes")
-        user_quizzes = ref.order_by_child("uid").equal_to(user["uid"]).get()
-        if quiz_id in user_quizzes:
+        user_quiz = await repository.get_quiz(quiz_id)
+        if user_quiz is not None and user_quiz.get("uid") == user["uid"]:
             return JSONResponse(
-                content=jsonable_encoder(user_quizzes[quiz_id])
+                content=jsonable_encoder(user_quiz),
+                headers={"ETag": compute_etag(user_quiz)},
             )
         else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Cannot find quiz with id {quiz_id}",
             )
-    except FirebaseError:
+    except RepositoryError:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @router.delete(
     "/",
-    status_code=status.HTTP_204_NO_CONTENT,
+    response_model=DeletedUserQuizzes,
     responses={
-        status.HTTP_204_NO_CONTENT: {"description": "Successful Response"},
+        status.HTTP_200_OK: {
+            "description": "Successful Response",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "deleted": ["YYYYYYYYYYYYYYYYYYYY"],
+                        "skipped": ["ZZZZZZZZZZZZZZZZZZZZ"],
+                    }
+                }
+            },
+        },
         status.HTTP_401_UNAUTHORIZED: {
             "content": {
                 "application/json": {
@@ -363,28 +460,29 @@ async def delete_user_quizzes(
     Delete user quizzes.
     """
     try:
-        ref = db.reference("Users")
-        user_details = (
-            ref.order_by_child("uid")
-            .equal_to(user["uid"])
-            .limit_to_first(1)
-            .get()
-        )
-        if user_details is None:
+        if await repository.get_user(user["uid"]) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User cannot be found",
             )
         else:
-            ref = db.reference("Quizzes")
-            user_quizzes = (
-                ref.order_by_child("uid").equal_to(user["uid"]).get()
+            user_quizzes = set(
+                await repository.get_quiz_summaries(user["uid"])
             )
-            for quiz_id in body.quizzes_ids:
+            deleted, skipped = [], []
+            for quiz_id in dict.fromkeys(body.quizzes_ids):
                 if quiz_id in user_quizzes:
-                    ref.child(quiz_id).delete()
-            return Response(status_code=status.HTTP_204_NO_CONTENT)
-    except FirebaseError:
+                    deleted.append(quiz_id)
+                else:
+                    skipped.append(quiz_id)
+            await repository.delete_quizzes(user["uid"], deleted)
+            response_cache.invalidate(quizzes_key(user["uid"]))
+            return JSONResponse(
+                content=jsonable_encoder(
+                    DeletedUserQuizzes(deleted=deleted, skipped=skipped)
+                )
+            )
+    except RepositoryError:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -415,29 +513,22 @@ async def delete_user_quiz(quiz_id: str, user=Depends(get_user_token)):
     Delete a user quiz.
     """
     try:
-        ref = db.reference("Users")
-        user_details = (
-            ref.order_by_child("uid")
-            .equal_to(user["uid"])
-            .limit_to_first(1)
-            .get()
-        )
-        if user_details is None:
+        if await repository.get_user(user["uid"]) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User cannot be found",
             )
-        ref = db.reference("Quizzes")
-        user_quizzes = ref.order_by_child("uid").equal_to(user["uid"]).get()
-        if quiz_id in user_quizzes:
-            ref.child(quiz_id).delete()
+        user_quiz = await repository.get_quiz(quiz_id)
+        if user_quiz is not None and user_quiz.get("uid") == user["uid"]:
+            await repository.delete_quiz(user["uid"], quiz_id)
+            response_cache.invalidate(quizzes_key(user["uid"]))
             return Response(status_code=status.HTTP_204_NO_CONTENT)
         else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Cannot find quiz with id {quiz_id}",
             )
-    except FirebaseError:
+    except RepositoryError:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -492,43 +583,76 @@ async def delete_user_quiz(quiz_id: str, user=Depends(get_user_token)):
                 }
             }
         },
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Quiz has been modified"}
+                }
+            }
+        },
         status.HTTP_500_INTERNAL_SERVER_ERROR: {},
     },
 )
 async def patch_user_quiz(
-    quiz_id: str, body: UpdateUserQuiz, user=Depends(get_user_token)
+    quiz_id: str,
+    body: UpdateUserQuiz,
+    user=Depends(get_user_token),
+    if_match: Optional[str] = Header(default=None),
 ):
     """
-    Update user quiz.
+    Update user quiz. Only the changed fields are written to the database.
+    When the If-Match header is given, the quiz is updated only if its ETag
+    still matches.
     """
     try:
-        ref = db.reference("Users")
-        user_details = (
-            ref.order_by_child("uid")
-            .equal_to(user["uid"])
-            .limit_to_first(1)
-            .get()
-        )
-        if user_details is None:
+        if await repository.get_user(user["uid"]) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User cannot be found",
             )
-        ref = db.reference("Quizzes")
-        user_quizzes = ref.order_by_child("uid").equal_to(user["uid"]).get()
-        if quiz_id in user_quizzes:
+        stored_quiz = await repository.get_quiz(quiz_id)
+        if stored_quiz is not None and stored_quiz.get("uid") == user["uid"]:
+            # fail early here, the write checks the ETag again atomically
+            if if_match is not None and not match_etag(
+                if_match, compute_etag(stored_quiz)
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="Quiz has been modified",
+                )
             user_quiz = UserQuiz(
                 **{
-                    **user_quizzes[quiz_id],
+                    **stored_quiz,
                     **{k: v for k, v in body.dict().items() if v is not None},
                 }
             )
-            ref.child(quiz_id).set(user_quiz.dict())
-            return JSONResponse(content=jsonable_encoder(user_quiz))
+            changes = {
+                k: v
+                for k, v in user_quiz.dict().items()
+                if stored_quiz.get(k) != v
+            }
+            updated_quiz = {
+                k: v
+                for k, v in {**stored_quiz, **changes}.items()
+                if v is not None
+            }
+            await repository.update_quiz(
+                quiz_id, changes, updated_quiz, if_match
+            )
+            response_cache.invalidate(quizzes_key(user["uid"]))
+            return JSONResponse(
+                content=jsonable_encoder(user_quiz),
+                headers={"ETag": compute_etag(updated_quiz)},
+            )
         else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Cannot find quiz with id {quiz_id}",
             )
-    except FirebaseError:
+    except QuizModifiedError:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Quiz has been modified",
+        )
+    except RepositoryError:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
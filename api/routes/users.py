@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from firebase_admin import db
-from firebase_admin.exceptions import FirebaseError
 
 from api.utils.timestamp import get_timestamp
 
 from ..dependencies import get_user_token
 from ..schemas.users import CreateUserAccount, UserAccount
+from ..services.repository import (
+    NicknameTakenError,
+    RepositoryError,
+    repository,
+)
+from ..services.response_cache import response_cache, user_key
 
 router = APIRouter()
 
@@ -71,35 +77,24 @@ async def post_user(body: CreateUserAccount, user=Depends(get_user_token)):
         }
     )
     try:
-        ref = db.reference("Users")
-        if (
-            ref.order_by_child("uid")
-            .equal_to(userAccount.uid)
-            .limit_to_first(1)
-            .get()
-            is not None
-        ):
+        if await repository.get_user(userAccount.uid) is not None:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Account already exists",
             )
-        if (
-            ref.order_by_child("nickname")
-            .equal_to(userAccount.nickname)
-            .limit_to_first(1)
-            .get()
-            is not None
-        ):
+        try:
+            await repository.create_user(userAccount.dict())
+            response_cache.invalidate(user_key(userAccount.uid))
+        except NicknameTakenError:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Nickname {userAccount.nickname} was already taken",
             )
-        ref.push().set(userAccount.dict())
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
             content=jsonable_encoder(userAccount),
         )
-    except FirebaseError:
+    except RepositoryError:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -124,6 +119,9 @@ async def post_user(body: CreateUserAccount, user=Depends(get_user_token)):
                 }
             },
         },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "User details have not changed"
+        },
         status.HTTP_401_UNAUTHORIZED: {
             "content": {
                 "application/json": {
@@ -141,26 +139,26 @@ async def post_user(body: CreateUserAccount, user=Depends(get_user_token)):
         status.HTTP_500_INTERNAL_SERVER_ERROR: {},
     },
 )
-async def get_user(user=Depends(get_user_token)):
+async def get_user(
+    user=Depends(get_user_token),
+    if_none_match: Optional[str] = Header(default=None),
+):
     """
     Get user details.
+    Responds with 304 when the If-None-Match header holds the current ETag.
     """
-    try:
-        ref = db.reference("Users")
-        user_details = (
-            ref.order_by_child("uid")
-            .equal_to(user["uid"])
-            .limit_to_first(1)
-            .get()
-        )
+    cached = response_cache.get(user_key(user["uid"]))
+    if cached is None:
+        try:
+            user_details = await repository.get_user(user["uid"])
+        except RepositoryError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         if user_details is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User cannot be found",
             )
-        else:
-            return JSONResponse(
-                content=jsonable_encoder(next(iter(user_details.items()))[1])
-            )
-    except FirebaseError:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        cached = response_cache.set(user_key(user["uid"]), user_details[1])
+    return cached.response(if_none_match)
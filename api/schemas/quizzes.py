@@ -32,6 +32,8 @@ class GameJoinModel(BaseModel):
     :param limit: - the limit of the game
     :param tags: - the tags of the game
     :param max_players: - the max players of the game
+    :param question_time: - the seconds to answer a question
+    :param answer_time: - the seconds the correct answer is shown
     """
 
     nickname: str = Field(
@@ -47,7 +49,9 @@ class GameJoinModel(BaseModel):
     difficulty: Optional[Literal["easy", "medium", "hard"]]
     limit: Optional[int] = 5
     tags: Optional[Union[str, List[str]]]
-    max_players: Optional[int] = 1
+    max_players: int = Field(1, ge=1)
+    question_time: Optional[float] = Field(ge=5, le=60)
+    answer_time: Optional[float] = Field(ge=1, le=10)
 
     @root_validator()
     def check_a_or_b(cls, values):
@@ -86,7 +90,7 @@ class GameAnswerModel(BaseModel):
     The GameAnswerModel class for the game answer model.
     """
 
-    answer: str
+    answer: int = Field(ge=0)
     time: Union[float, int]
 
     class Config:
@@ -146,6 +150,19 @@ class DeleteUserQuizzes(BaseModel):
         extra = Extra.forbid
 
 
+class DeletedUserQuizzes(BaseModel):
+    """
+    The DeletedUserQuizzes class is used to report the result of deleting
+    quizzes.
+    :param deleted: - the ids of deleted quizzes
+    :param skipped: - the ids of quizzes that do not exist or belong to
+        someone else
+    """
+
+    deleted: List[str]
+    skipped: List[str]
+
+
 class CreateUserQuiz(BaseModel):
     """
     This will be used to create a quiz for a user.
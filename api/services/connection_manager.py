@@ -1,20 +1,67 @@
 from asyncio import TimeoutError, sleep, wait_for
-from collections import defaultdict
-from random import shuffle
-from typing import List
+from typing import Dict, Optional, Tuple
 from uuid import uuid4
 
-from firebase_admin import db
-from firebase_admin.exceptions import FirebaseError
+import httpx
 from pydantic import ValidationError
-from requests import get
 from socketio import AsyncNamespace
+from socketio.exceptions import ConnectionRefusedError
 
 from ..config import settings
 from ..schemas.quizzes import GameAnswerModel, GameCodeJoinModel, GameJoinModel
 from ..schemas.users import UserAccount
-from ..utils.parse_url import parse_url
 from ..utils.points import points_function
+from .game_room import Room, compile_question
+from .game_scheduler import game_scheduler
+from .question_pool import PoolKey, pool_key, question_pool
+from .quiz_api import QuizApiUnavailableError
+from .repository import RepositoryError, repository
+from .response_cache import response_cache, user_key
+from .token_cache import token_cache
+
+LobbyKey = Tuple[PoolKey, int, Optional[str], float, float]
+
+
+def phase_times(options: dict) -> Tuple[float, float]:
+    """
+    Get the phase durations chosen by the player or the defaults from the
+    settings.
+    :param options: - the options for the game
+    :return: the seconds to answer a question and to show the answer
+    """
+    return (
+        options.get("question_time") or settings.game.question_time,
+        options.get("answer_time") or settings.game.answer_time,
+    )
+
+
+def lobby_key(options: dict) -> LobbyKey:
+    """
+    Get the matchmaking key of the game options, equal for the games whose
+    players can play together whatever their nickname and uid.
+    :param options: - the options for the game
+    :return: the key
+    """
+    return (
+        pool_key(options),
+        options["max_players"],
+        options.get("quiz_id"),
+        *phase_times(options),
+    )
+
+
+def create_room(options: dict) -> Room:
+    """
+    Create the room of the game.
+    :param options: - the options for the game
+    :return: the room
+    """
+    question_time, answer_time = phase_times(options)
+    return Room(
+        max_players=options["max_players"],
+        question_time=question_time,
+        answer_time=answer_time,
+    )
 
 
 class ConnectionManager(AsyncNamespace):
@@ -24,29 +71,104 @@ class ConnectionManager(AsyncNamespace):
 
     def __init__(self, *args, **kwargs):
         super(ConnectionManager, self).__init__(*args, **kwargs)
-        self.connections: dict = defaultdict(dict)
+        self.connections: Dict[str, Room] = {}
+        self.lobbies: Dict[LobbyKey, Dict[str, None]] = {}
+        self.lobby_keys: Dict[str, LobbyKey] = {}
+        self.player_rooms: Dict[str, str] = {}
+        self.pinned_uids: Dict[str, str] = {}
+
+    def get_room(self, sid: str) -> str:
+        """
+        Given a session id, return the room of its game, without scanning
+        the rooms of the server.
+        :param sid: - the session id
+        :return: the room, or the session id for a solo game
+        """
+        return self.player_rooms.get(sid, sid)
 
-    def get_rooms(self, sid: str) -> List[str]:
+    def join_room(self, sid: str, room: str) -> None:
         """
-        Given a session id, return a list of all the rooms.
+        Enter the player into the room of an online game.
         :param sid: - the session id
-        :return: a list of all the rooms
+        :param room: - the room
         """
-        return list(filter(lambda x: x != sid, self.rooms(sid)))
+        self.enter_room(sid, room)
+        self.player_rooms[sid] = room
 
     def end_connection(self, sid: str) -> None:
         """
-        When a player disconnects, remove them from the list of current players in the room.
+        When a player disconnects, remove them from the current players of
+        the room, and the room once nobody plays in it. A lobby the player
+        leaves is open again for the freed seat.
         :param sid: - the session id of the player disconnecting
         """
-        if len(self.rooms(sid)) > 1:
-            room = self.get_rooms(sid)[0]
-            if len(self.connections[room]["current_players"]) > 0:
-                self.connections[room]["current_players"].remove(sid)
-            if len(self.connections[room]["current_players"]) <= 0:
-                self.connections.pop(room, None)
-        else:
-            self.connections.pop(sid, None)
+        room = self.player_rooms.pop(sid, sid)
+        connection = self.connections.get(room)
+        if connection is not None:
+            connection.leave(sid)
+            if len(connection.current_players) == 0:
+                self.remove_connection(room)
+            elif (
+                connection.phase == Room.LOBBY
+                and not connection.is_full
+                and room in self.lobby_keys
+            ):
+                self.open_lobby(room, self.lobby_keys[room])
+
+    def remove_connection(self, room: str) -> None:
+        """
+        Remove the room, closing its lobby, cancelling its pending phase and
+        waking up its waiting game.
+        :param room: - the room or the session id of a solo game
+        """
+        connection = self.connections.pop(room, None)
+        if connection is not None:
+            if connection.timer is not None:
+                connection.timer.cancel()
+            if connection.filled is not None:
+                connection.filled.set()
+        self.close_lobby(room)
+        self.lobby_keys.pop(room, None)
+
+    def open_lobby(self, room: str, key: LobbyKey) -> None:
+        """
+        Let players with the same game options join the room.
+        :param room: - the room
+        :param key: - the matchmaking key of the game options
+        """
+        self.lobbies.setdefault(key, {})[room] = None
+        self.lobby_keys[room] = key
+
+    def close_lobby(self, room: str) -> None:
+        """
+        Stop matching players to the room, e.g. once it is full or started.
+        The key is kept until the room is removed, to open the lobby again.
+        :param room: - the room
+        """
+        key = self.lobby_keys.get(room)
+        if key is not None and key in self.lobbies:
+            rooms = self.lobbies[key]
+            rooms.pop(room, None)
+            if len(rooms) == 0:
+                del self.lobbies[key]
+
+    def seat_player(self, room: str) -> None:
+        """
+        Close the lobby of the room once every seat is taken.
+        :param room: - the room
+        """
+        if self.connections[room].is_full:
+            self.close_lobby(room)
+
+    def find_lobby(self, key: LobbyKey) -> Optional[str]:
+        """
+        Find the oldest open room for the game options.
+        :param key: - the matchmaking key of the game options
+        :return: the room or None
+        """
+        for room in self.lobbies.get(key, ()):
+            return room
+        return None
 
     def is_active_connection(self, sid: str) -> bool:
         """
@@ -63,69 +185,63 @@ class ConnectionManager(AsyncNamespace):
         :param options: - the options dictionary containing the quiz id.
         """
         try:
-            ref = db.reference("Users")
-            user_details = (
-                ref.order_by_child("uid")
-                .equal_to(options["uid"])
-                .limit_to_first(1)
-                .get()
-            )
-            if user_details is None:
-                await self.emit("error", "User cannot be found", room=sid)
-                await self.disconnect(sid)
-            ref = db.reference("Quizzes")
-            user_quizzes = (
-                ref.order_by_child("uid").equal_to(options["uid"]).get()
-            )
-            print(user_quizzes)
-            if options["quiz_id"] in user_quizzes:
-                questions = [
-                    {
-                        "question": q["question"],
-                        "correct_answer": q["correct_answer"],
-                        "answers": [q["correct_answer"]]
-                        + q["incorrect_answers"],
-                    }
-                    for q in user_quizzes[options["quiz_id"]]["questions"]
-                ]
-                print(questions)
-                self.connections[sid]["questions"] = questions
-            else:
-                await self.emit(
-                    "error",
-                    f"Cannot find quiz with id {options['quiz_id']}",
-                    room=sid,
+            if await repository.get_user(options["uid"]) is None:
+                await self.abort_game(sid, "User cannot be found")
+                return
+            user_quiz = await repository.get_quiz(options["quiz_id"])
+            if user_quiz is None or user_quiz.get("uid") != options["uid"]:
+                await self.abort_game(
+                    sid, f"Cannot find quiz with id {options['quiz_id']}"
                 )
-                await self.disconnect(sid)
-        except FirebaseError:
-            await self.emit("error", "Connection error", room=sid)
-            await self.disconnect(sid)
+                return
+            questions = tuple(
+                compile_question(
+                    q["question"],
+                    q["correct_answer"],
+                    q["incorrect_answers"],
+                )
+                for q in user_quiz.get("questions") or ()
+            )
+            if len(questions) == 0:
+                await self.abort_game(sid, "No questions found")
+            elif self.is_active_connection(sid):
+                self.connections[sid].load(questions)
+        except RepositoryError:
+            await self.abort_game(sid, "Connection error")
 
     async def get_questions(self, sid: str, options: dict) -> None:
         """
-        Get the questions from the server.
+        Get the questions from the pool of the quiz api questions.
         :param sid: - the socket id of the client requesting questions.
         :param options: - the options for the game.
         """
-        url = settings.server.quiz_api + "/questions"
-        exclude_keys = ["max_players", "nickname", "game_options"]
-        options_without_exclude_keys = {
-            k: options[k]
-            for k in set(list(options.keys())) - set(exclude_keys)
-        }
-        result = get(parse_url(url, options_without_exclude_keys))
-        if result.status_code == 200:
-            questions = [
-                {
-                    "question": q["question"],
-                    "correct_answer": q["correctAnswer"],
-                    "answers": [q["correctAnswer"]] + q["incorrectAnswers"],
-                }
-                for q in result.json()
-            ]
-            self.connections[sid]["questions"] = questions
-        else:
-            await self.emit("error", "Connection error", room=sid)
+        try:
+            questions = await question_pool.get(options)
+        except QuizApiUnavailableError:
+            await self.abort_game(sid, "Quiz service is unavailable")
+            return
+        except (httpx.HTTPError, ValueError, KeyError):
+            await self.abort_game(sid, "Connection error")
+            return
+        if len(questions) == 0:
+            await self.abort_game(sid, "No questions found")
+        elif self.is_active_connection(sid):
+            self.connections[sid].load(questions)
+
+    async def abort_game(self, room: str, message: str) -> None:
+        """
+        Send the error to the players of a game that cannot start, remove
+        its room and lobby, and disconnect its players.
+        :param room: - the room, or the session id of a solo game
+        :param message: - the error message
+        """
+        await self.emit("error", message, room=room)
+        connection = self.connections.get(room)
+        sids = list(connection.players) if connection is not None else [room]
+        self.remove_connection(room)
+        if room not in sids:  # online game
+            await self.close_room(room)
+        for sid in sids:
             await self.disconnect(sid)
 
     async def send_results(self, sid: str) -> None:
@@ -133,24 +249,14 @@ class ConnectionManager(AsyncNamespace):
         Send the results of the game to the database.
         :param sid: - the session id
         """
-        session = self.connections[sid]
-        points = session["points"]
-        nicknames = session["nicknames"]
-        await self.emit(
-            "results", {nicknames[k]: points[k] for k in nicknames}
-        )
-        uids = session["uids"]
-        ref = db.reference("Users")
-        for (user, uid) in uids.items():
-            if user in points:
-                user_details = (
-                    ref.order_by_child("uid")
-                    .equal_to(uid)
-                    .limit_to_first(1)
-                    .get()
-                )
+        connection = self.connections[sid]
+        await self.emit("results", connection.results())
+        points = connection.points()
+        for user, player in connection.players.items():
+            if user in points and player.uid is not None:
+                user_details = await repository.get_user(player.uid)
                 if user_details is not None:
-                    (key, values) = next(iter(user_details.items()))
+                    key, values = user_details
                     update = dict()
                     if len(points.keys()) > 1:
                         if (
@@ -176,60 +282,142 @@ class ConnectionManager(AsyncNamespace):
                     if points[user] > values["max_points"]:
                         update["max_points"] = points[user]
                     user_account = UserAccount(**{**values, **update})
-                    ref.child(key).set(user_account.dict())
+                    await repository.update_user(key, user_account.dict())
+                    response_cache.invalidate(user_key(player.uid))
 
-    async def send_questions(self, sid: str) -> None:
+    async def send_questions(self, room: str, host: str) -> None:
         """
-        Send the questions, the correct answer and results to the client.
-        :param sid: - the session id of the client.
+        Start sending the questions. The game scheduler then advances the
+        room through the question, answer and results phases, so no handler
+        waits for the game to end.
+        :param room: - the room, or the session id of a solo game
+        :param host: - the session id of the player who created the game
         """
-        if not self.is_active_connection(sid):
+        await self.ask_question(room, host, 0)
+
+    async def ask_question(self, room: str, host: str, index: int) -> None:
+        """
+        Send the question and schedule its answer, or send the results
+        after the last question.
+        :param room: - the room, or the session id of a solo game
+        :param host: - the session id of the player who created the game
+        :param index: - the index of the question
+        """
+        if not self.is_active_connection(room):
+            await self.close_game(room, host)
             return
-        session_data = self.connections[sid]
-        questions = session_data["questions"]
-        for index, q in enumerate(questions):
-            if self.is_active_connection(sid):
-                q = questions[index]
-                shuffle(q["answers"])
-                question = {"question": q["question"], "answers": q["answers"]}
-                print(self.connections[sid])
-                await self.emit("question", question, room=sid)
-                self.connections[sid]["current_question"] = index
-                await sleep(
-                    12
-                )  # 12 seconds for answer and 3 seconds for showing results
-                await self.emit("answer", q["correct_answer"], room=sid)
-                await sleep(3)
-            else:
-                return
-        await self.send_results(sid)
+        connection = self.connections[room]
+        if index >= len(connection.questions):
+            connection.move(Room.RESULTS)
+            await self.send_results(room)
+            await self.close_game(room, host)
+            return
+        answers = connection.ask(index)
+        await self.emit(
+            "question",
+            {
+                "question": connection.questions[index].question,
+                "answers": answers,
+            },
+            room=room,
+        )
+        connection.timer = game_scheduler.call_later(
+            connection.question_time, self.reveal_answer, room, host, index
+        )
 
-    async def wait_for_players(self, sid: str) -> None:
+    async def reveal_answer(self, room: str, host: str, index: int) -> None:
         """
-        Wait for the players to connect before starting the game.
-        :param sid: - the session id
+        Send the correct answer and schedule the next question.
+        :param room: - the room, or the session id of a solo game
+        :param host: - the session id of the player who created the game
+        :param index: - the index of the question
         """
+        if not self.is_active_connection(room):
+            await self.close_game(room, host)
+            return
+        connection = self.connections[room]
+        connection.move(Room.ANSWER)
+        await self.emit("answer", connection.correct_answer, room=room)
+        connection.timer = game_scheduler.call_later(
+            connection.answer_time, self.ask_question, room, host, index + 1
+        )
 
-        async def periodic():
-            while True:
-                if not self.is_active_connection(sid):
-                    return
-                elif (
-                    len(self.connections[sid]["current_players"])
-                    == self.connections[sid]["game_options"]["max_players"]
-                ):  # noqa
-                    return
-                await sleep(1)
+    async def close_game(self, room: str, host: str) -> None:
+        """
+        Disconnect the players of the ended game.
+        :param room: - the room, or the session id of a solo game
+        :param host: - the session id of the player who created the game
+        """
+        if room != host:  # online game
+            if self.is_active_connection(room):
+                for s in list(self.connections[room].current_players):
+                    if s != host:
+                        await self.disconnect(s)
+            await self.close_room(room)
+            self.remove_connection(room)
+        await self.disconnect(host)
 
+    async def wait_for_players(self, sid: str) -> None:
+        """
+        Wait for the players to connect before starting the game. The room
+        signals its event once every player is ready or the room ends, so
+        the game starts the moment the room fills.
+        :param sid: - the session id
+        """
+        if not self.is_active_connection(sid):
+            return
+        filled = self.connections[sid].filled
+        if filled is None:  # solo or started game
+            return
         try:
-            await wait_for(periodic(), timeout=30)
+            await wait_for(filled.wait(), timeout=settings.game.lobby_timeout)
         except TimeoutError:
             print("No more users connect")
             await self.emit("timeout", None, to=sid)
             await sleep(0.5)
 
-    async def on_connect(self, sid: str, environ: dict) -> None:
-        pass
+    async def get_uid(self, sid: str) -> Optional[str]:
+        """
+        Get the uid bound to the session at connect time.
+        :param sid: - the session id
+        :return: the uid or None for guests
+        """
+        session = await self.get_session(sid)
+        return session.get("uid")
+
+    async def on_connect(
+        self, sid: str, environ: dict, auth: Optional[dict] = None
+    ) -> None:
+        """
+        Verify the bearer token sent in the auth payload or the
+        Authorization header and bind its uid to the session. The token is
+        verified through the same cache as the REST API and the user stays
+        in the users cache until the disconnect, so the game reads it from
+        memory.
+        Clients without a token join as guests.
+        :param sid: - the session id
+        :param environ: - the WSGI environment of the handshake request
+        :param auth: - the auth payload, e.g. {"token": "..."}
+        """
+        token = (auth or {}).get("token")
+        if token is None:
+            scheme, _, credentials = environ.get(
+                "HTTP_AUTHORIZATION", ""
+            ).partition(" ")
+            if scheme.lower() == "bearer" and credentials:
+                token = credentials
+        if token is None:
+            return
+        try:
+            claims = await token_cache.verify(token)
+        except Exception:
+            raise ConnectionRefusedError("Invalid authentication")
+        await self.save_session(sid, {"uid": claims["uid"]})
+        self.pinned_uids[sid] = claims["uid"]
+        try:
+            await repository.pin_user(claims["uid"])
+        except RepositoryError:
+            pass
 
     async def on_join(self, sid: str, options) -> None:
         """
@@ -237,87 +425,58 @@ class ConnectionManager(AsyncNamespace):
         :param sid: - the session id
         :param options: - the options for the game
         """
+        uid = await self.get_uid(sid)
+        if isinstance(options, dict) and options.get("uid") not in (None, uid):
+            await self.emit("error", "Authentication is needed", to=sid)
+            await self.disconnect(sid)
+            return
         try:
-            game_options = GameJoinModel(**options)  # validate input
+            # validate input with the uid bound to the session
+            game_options = GameJoinModel(**{**options, "uid": uid})
 
             if game_options.max_players == 1:
-                self.connections[sid] = {
-                    "current_players": [sid],
-                    "points": {sid: 0},
-                    "current_question": 0,
-                    "nicknames": {sid: game_options.nickname},
-                    "uids": {},
-                    "answered": {},
-                }
-                if game_options.uid is not None:
-                    self.connections[sid]["uids"][sid] = game_options.uid
+                connection = create_room(game_options.dict())
+                connection.seat(sid, game_options.nickname, game_options.uid)
+                self.connections[sid] = connection
                 if game_options.quiz_id is not None:
                     await self.get_questions_from_db(sid, game_options.dict())
                 else:
                     await self.get_questions(sid, game_options.dict())
-                self.connections[sid]["answered"][sid] = [False] * len(self.connections[sid]["questions"])  # type: ignore # noqa
-                await self.send_questions(sid)
-                await self.disconnect(sid)
+                if not self.is_active_connection(sid):
+                    return
+                connection.set_ready(sid)
+                await self.send_questions(sid, sid)
             else:  # online game
-                if len(self.connections.keys()) > 0:
-                    game_options_withou_name = game_options.dict().copy()
-                    game_options_withou_name.pop("nickname")
-                    game_options_withou_name.pop("uid")
-                    for room, connection in self.connections.items():
-                        if "game_options" in connection:
-                            connection_game_options_withou_name = connection[
-                                "game_options"
-                            ].copy()  # noqa
-                            connection_game_options_withou_name.pop("nickname")
-                            connection_game_options_withou_name.pop("uid")
-                            if (
-                                connection_game_options_withou_name
-                                == game_options_withou_name
-                            ):  # noqa
-                                print("it is", room)
-                                self.enter_room(sid, room)
-                                self.connections[room]["nicknames"][
-                                    sid
-                                ] = game_options.nickname  # noqa
-                                if game_options.uid is not None:
-                                    self.connections[room]["uids"][
-                                        sid
-                                    ] = game_options.uid
-                                await self.emit(
-                                    "join",
-                                    {
-                                        "room": room,
-                                        "number_of_players": len(
-                                            self.connections[room][
-                                                "current_players"
-                                            ]
-                                        ),
-                                        "max_number_of_players": self.connections[
-                                            room
-                                        ][
-                                            "game_options"
-                                        ][
-                                            "max_players"
-                                        ],
-                                    },
-                                    to=sid,
-                                )
-                                return
+                key = lobby_key(game_options.dict())
+                room = self.find_lobby(key)
+                if room is not None:
+                    self.join_room(sid, room)
+                    self.connections[room].seat(
+                        sid, game_options.nickname, game_options.uid
+                    )
+                    self.seat_player(room)
+                    await self.emit(
+                        "join",
+                        {
+                            "room": room,
+                            "number_of_players": len(
+                                self.connections[room].current_players
+                            ),
+                            "max_number_of_players": self.connections[
+                                room
+                            ].max_players,
+                        },
+                        to=sid,
+                    )
+                    return
 
                 # if no connections found, create one
                 room = str(uuid4())
-                self.enter_room(sid, room)
-                self.connections[room] = {
-                    "current_players": [],
-                    "points": {},
-                    "current_question": 0,
-                    "nicknames": {sid: game_options.nickname},
-                    "answered": {},
-                    "uids": {},
-                    "game_options": game_options.dict(),
-                }
-                if game_options.uid is not None:
-                    self.connections[room]["uids"][sid] = game_options.uid
+                self.join_room(sid, room)
+                connection = create_room(game_options.dict())
+                connection.seat(sid, game_options.nickname, game_options.uid)
+                self.connections[room] = connection
+                self.open_lobby(room, key)
                 if game_options.quiz_id is not None:
                     await self.get_questions_from_db(
                         sid=room, options=game_options.dict()
@@ -326,56 +485,47 @@ class ConnectionManager(AsyncNamespace):
                     await self.get_questions(
                         sid=room, options=game_options.dict()
                     )
+                if not self.is_active_connection(room):
+                    return
                 await self.emit(
                     "join",
                     {
                         "room": room,
-                        "number_of_players": len(
-                            self.connections[room]["current_players"]
-                        ),
-                        "max_number_of_players": self.connections[room][
-                            "game_options"
-                        ]["max_players"],
+                        "number_of_players": len(connection.current_players),
+                        "max_number_of_players": connection.max_players,
                     },
                     to=sid,
                 )
                 await self.wait_for_players(sid=room)
+                self.close_lobby(room)
                 if (
-                    "current_players" in self.connections[room]
-                    and len(self.connections[room]["current_players"]) > 0
+                    self.is_active_connection(room)
+                    and len(connection.current_players) > 0
                 ):
-                    await self.send_questions(sid=room)
-                if self.is_active_connection(room):
-                    for s in self.connections[room]["current_players"]:
-                        if s != sid:
-                            await self.disconnect(s)
-                await self.close_room(room)
-                self.end_connection(room)
-                await self.disconnect(sid)
+                    await self.send_questions(room, sid)
+                else:
+                    await self.close_game(room, sid)
 
         except ValidationError:
             try:
-                game_code_options = GameCodeJoinModel(**options)
+                game_code_options = GameCodeJoinModel(
+                    **{**options, "uid": uid}
+                )
                 if self.is_active_connection(game_code_options.room):
-                    self.enter_room(sid, game_code_options.room)
-                    self.connections[game_code_options.room]["nicknames"][
-                        sid
-                    ] = game_code_options.nickname  # noqa
-                    self.connections[game_code_options.room]["uids"][
-                        sid
-                    ] = game_code_options.uid  # noqa
+                    connection = self.connections[game_code_options.room]
+                    self.join_room(sid, game_code_options.room)
+                    connection.seat(
+                        sid, game_code_options.nickname, game_code_options.uid
+                    )
+                    self.seat_player(game_code_options.room)
                     await self.emit(
                         "join",
                         {
                             "room": game_code_options.room,
                             "number_of_players": len(
-                                self.connections[game_code_options.room][
-                                    "current_players"
-                                ]
+                                connection.current_players
                             ),
-                            "max_number_of_players": self.connections[room][
-                                "game_options"
-                            ]["max_players"],
+                            "max_number_of_players": connection.max_players,
                         },
                         to=sid,
                     )
@@ -391,22 +541,17 @@ class ConnectionManager(AsyncNamespace):
         This event is called when a player is ready.
         :param sid: - the session id
         """
-        room = self.get_rooms(sid)[0]
-        print(room, sid)
-        if sid not in self.connections[room]["current_players"]:
-            self.connections[room]["points"][sid] = 0
-            self.connections[room]["answered"][sid] = [False] * len(self.connections[room]["questions"])  # type: ignore # noqa
-            self.connections[room]["current_players"].append(sid)
+        room = self.get_room(sid)
+        if not self.is_active_connection(room):
+            return
+        connection = self.connections[room]
+        if connection.set_ready(sid):
             await self.emit(
                 "join",
                 {
                     "room": room,
-                    "number_of_players": len(
-                        self.connections[room]["current_players"]
-                    ),
-                    "max_number_of_players": self.connections[room][
-                        "game_options"
-                    ]["max_players"],
+                    "number_of_players": len(connection.current_players),
+                    "max_number_of_players": connection.max_players,
                 },
                 to=room,
             )
@@ -417,41 +562,30 @@ class ConnectionManager(AsyncNamespace):
         :param sid: - the socket id of the user answering the question
         :param data: - the data sent by the user
         """
-        room = sid if len(self.get_rooms(sid)) == 0 else self.get_rooms(sid)[0]
+        room = self.get_room(sid)
         if self.is_active_connection(room):
             try:
                 answer_data = GameAnswerModel(**data)
-
-                session_data = self.connections[room]
-                current_question = session_data["current_question"]
-                correct_answer = session_data["questions"][current_question][
-                    "correct_answer"
-                ]
-                answered = session_data["answered"][sid][current_question]
-
-                if not answered:
-                    print("ANSWER => ", answer_data.answer, correct_answer)
-                    if answer_data.answer == correct_answer:
-                        self.connections[room]["points"][
-                            sid
-                        ] += points_function(
+                connection = self.connections[room]
+                correct = connection.answer(sid, answer_data.answer)
+                if correct is not None:
+                    if correct:
+                        connection.players[sid].points += points_function(
                             answer_data.time
-                        )  # time function go here
-                    await self.emit("answer", correct_answer, sid)
-                    self.connections[room]["answered"][sid][
-                        current_question
-                    ] = True
-
+                        )
+                    await self.emit("answer", connection.correct_answer, sid)
             except ValidationError:
                 await self.emit("error", "Invalid input", sid)
                 await self.disconnect(sid)
 
     async def on_end(self, sid: str) -> None:
         """
-        When a client end the game.
+        When a client end the game, end the connection and disconnect the
+        client, as the cancelled phases of its game would have done.
         :param sid: - the session id of the client ending game.
         """
         self.end_connection(sid)
+        await self.disconnect(sid)
 
     def on_disconnect(self, sid: str) -> None:
         """
@@ -459,4 +593,7 @@ class ConnectionManager(AsyncNamespace):
         :param sid: - the session id of the client disconnecting.
         """
         self.end_connection(sid)
+        uid = self.pinned_uids.pop(sid, None)
+        if uid is not None:
+            repository.unpin_user(uid)
         print("disconnect")
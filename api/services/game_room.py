@@ -0,0 +1,247 @@
+from asyncio import Event
+from random import shuffle
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .game_scheduler import Timer
+
+
+class RoomStateError(Exception):
+    """
+    Raised when a room is moved to a phase it cannot reach from its own.
+    """
+
+
+class GameQuestion(NamedTuple):
+    """
+    Question compiled once when it is loaded and shared by every game asking
+    it. Answers are identified by their index in the answers.
+    :param question: - the question
+    :param answers: - the answers
+    :param correct: - the index of the correct answer
+    """
+
+    question: str
+    answers: Tuple[str, ...]
+    correct: int = 0
+
+
+def compile_question(
+    question: str, correct_answer: str, incorrect_answers: List[str]
+) -> GameQuestion:
+    """
+    Compile the question, with the correct answer first.
+    :param question: - the question
+    :param correct_answer: - the correct answer
+    :param incorrect_answers: - the incorrect answers
+    :return: the compiled question
+    """
+    return GameQuestion(question, (correct_answer, *incorrect_answers), 0)
+
+
+class Player:
+    """
+    Player seated in a room.
+    :param nickname: - the nickname of the player
+    :param uid: - the uid of the signed in user or None for guests
+    """
+
+    __slots__ = ("nickname", "uid", "points", "ready", "answered")
+
+    def __init__(self, nickname: str, uid: Optional[str] = None):
+        self.nickname = nickname
+        self.uid = uid
+        self.points = 0
+        self.ready = False
+        self.answered = bytearray()
+
+
+class Room:
+    """
+    State of one game. Players are seated when they join and play once they
+    are ready. The room moves from the lobby through the question and answer
+    phases of every question to the results, only along TRANSITIONS. The
+    answered flags of a player take one byte per question. Every asked
+    question gets its own answer order, and only the index of the correct
+    answer in that order is kept, so grading compares two integers. The
+    pending timer of the next phase is kept to cancel it with the room.
+    :param max_players: - the max players of the game
+    :param question_time: - the seconds to answer a question
+    :param answer_time: - the seconds the correct answer is shown
+    """
+
+    LOBBY = "lobby"
+    QUESTION = "question"
+    ANSWER = "answer"
+    RESULTS = "results"
+
+    TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+        LOBBY: (QUESTION, RESULTS),
+        QUESTION: (ANSWER,),
+        ANSWER: (QUESTION, RESULTS),
+        RESULTS: (),
+    }
+
+    __slots__ = (
+        "players",
+        "current_players",
+        "max_players",
+        "question_time",
+        "answer_time",
+        "questions",
+        "current_question",
+        "correct_answer",
+        "phase",
+        "filled",
+        "timer",
+    )
+
+    def __init__(
+        self,
+        max_players: int = 1,
+        question_time: float = 12.0,
+        answer_time: float = 3.0,
+    ):
+        self.players: Dict[str, Player] = {}
+        self.current_players: Set[str] = set()
+        self.max_players = max_players
+        self.question_time = question_time
+        self.answer_time = answer_time
+        self.questions: Sequence[GameQuestion] = ()
+        self.current_question = 0
+        self.correct_answer = -1
+        self.phase = self.LOBBY
+        self.filled: Optional[Event] = Event() if max_players != 1 else None
+        self.timer: Optional[Timer] = None
+
+    @property
+    def is_full(self) -> bool:
+        """
+        Check if every seat of the room is taken.
+        :return: True if no more players can join
+        """
+        return len(self.players) >= self.max_players
+
+    def seat(self, sid: str, nickname: str, uid: Optional[str] = None) -> None:
+        """
+        Seat the joining player.
+        :param sid: - the session id of the player
+        :param nickname: - the nickname of the player
+        :param uid: - the uid of the signed in user or None for guests
+        """
+        self.players[sid] = Player(nickname, uid)
+
+    def set_ready(self, sid: str) -> bool:
+        """
+        Let the seated player play, setting the filled event once every
+        player is ready. A room without questions refuses the player, who
+        plays once the questions are loaded.
+        :param sid: - the session id of the player
+        :return: False if the player is not seated or already ready, or the
+            room has no questions
+        """
+        player = self.players.get(sid)
+        if player is None or sid in self.current_players:
+            return False
+        if not self.questions:
+            player.ready = True  # plays once the questions are loaded
+            return False
+        player.points = 0
+        player.ready = True
+        player.answered = bytearray(len(self.questions))
+        self.current_players.add(sid)
+        if (
+            self.filled is not None
+            and len(self.current_players) >= self.max_players
+        ):
+            self.filled.set()
+        return True
+
+    def load(self, questions: Sequence[GameQuestion]) -> None:
+        """
+        Set the questions of the game and let the players who got ready
+        while they were loading play.
+        :param questions: - the questions
+        """
+        self.questions = questions
+        for sid, player in self.players.items():
+            if player.ready:
+                self.set_ready(sid)
+
+    def leave(self, sid: str) -> None:
+        """
+        Remove the disconnected player from the current players. Their seat
+        is freed while the room is in the lobby, otherwise their points
+        still count in the results.
+        :param sid: - the session id of the player
+        """
+        self.current_players.discard(sid)
+        if self.phase == self.LOBBY:
+            self.players.pop(sid, None)
+
+    def move(self, phase: str) -> None:
+        """
+        Move the room to the next phase.
+        :param phase: - the next phase
+        :raises RoomStateError: if the phase cannot follow the current one
+        """
+        if phase not in self.TRANSITIONS[self.phase]:
+            raise RoomStateError(f"Cannot move from {self.phase} to {phase}")
+        self.phase = phase
+
+    def ask(self, index: int) -> List[str]:
+        """
+        Open the question for answers, in a new answer order.
+        :param index: - the index of the question
+        :return: the answers in the order shown to the players
+        :raises RoomStateError: if the room has no questions
+        """
+        if not self.questions:
+            raise RoomStateError("Cannot start a room without questions")
+        if self.phase == self.LOBBY:
+            for sid in self.current_players:
+                self.players[sid].answered = bytearray(len(self.questions))
+            self.filled = None  # nobody waits for the started game
+        self.move(self.QUESTION)
+        self.current_question = index
+        question = self.questions[index]
+        order = list(range(len(question.answers)))
+        shuffle(order)
+        self.correct_answer = order.index(question.correct)
+        return [question.answers[answer] for answer in order]
+
+    def answer(self, sid: str, answer: int) -> Optional[bool]:
+        """
+        Grade the answer of the player to the current question.
+        :param sid: - the session id of the player
+        :param answer: - the index of the answer in the shown order
+        :return: whether the answer is correct or None if the player is not
+            playing, the question is closed or the player has already
+            answered it
+        """
+        if self.phase != self.QUESTION or sid not in self.current_players:
+            return None
+        answered = self.players[sid].answered
+        if answered[self.current_question]:
+            return None
+        answered[self.current_question] = 1
+        return answer == self.correct_answer
+
+    def points(self) -> Dict[str, int]:
+        """
+        Get the points of the players who played.
+        :return: the points by session id
+        """
+        return {
+            sid: player.points
+            for sid, player in self.players.items()
+            if player.ready
+        }
+
+    def results(self) -> Dict[str, int]:
+        """
+        Get the results sent to the players.
+        :return: the points by nickname
+        """
+        return {
+            player.nickname: player.points for player in self.players.values()
+        }
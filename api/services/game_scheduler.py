@@ -0,0 +1,159 @@
+import asyncio
+from heapq import heappop, heappush
+from itertools import count
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+
+class Timer:
+    """
+    Scheduled call of a coroutine function.
+    """
+
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(
+        self,
+        deadline: float,
+        callback: Callable[..., Awaitable],
+        args: Tuple[Any, ...],
+    ):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """
+        Cancel the call, if it has not been made yet.
+        """
+        self.cancelled = True
+
+
+class GameScheduler:
+    """
+    Timers of the game phases of every room, kept in one heap and fired by a
+    single task, so a running game is a few heap entries instead of a
+    coroutine sleeping through the whole game. Every fired timer runs its
+    callback in a short-lived task, so a slow emit never delays other rooms.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Timer]] = []
+        self._counter = count()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Set[asyncio.Task] = set()
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def call_later(
+        self, delay: float, callback: Callable[..., Awaitable], *args: Any
+    ) -> Timer:
+        """
+        Call the coroutine function after the delay.
+        :param delay: - the delay in seconds
+        :param callback: - the coroutine function
+        :param args: - the arguments for the function
+        :return: the timer, which can be cancelled
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not loop
+        ):
+            self._heap.clear()
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        timer = Timer(loop.time() + delay, callback, args)
+        heappush(self._heap, (timer.deadline, next(self._counter), timer))
+        if self._heap[0][2] is timer:
+            self._wakeup.set()  # type: ignore
+        return timer
+
+    async def _run(self) -> None:
+        """
+        Fire the due timers and sleep until the next deadline.
+        """
+        loop = asyncio.get_running_loop()
+        wakeup = self._wakeup
+        assert wakeup is not None
+        while True:
+            wakeup.clear()
+            now = loop.time()
+            while self._heap and self._heap[0][0] <= now:
+                timer = heappop(self._heap)[2]
+                if not timer.cancelled:
+                    self.fired += 1
+                    self._spawn(timer.callback(*timer.args))
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, coroutine: Awaitable) -> None:
+        """
+        Run the callback in its own task, keeping a reference until it ends.
+        :param coroutine: - the coroutine of the callback
+        """
+        task = asyncio.ensure_future(coroutine)
+        self._running.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task) -> None:
+        """
+        Forget the finished callback and report its failure.
+        :param task: - the task of the callback
+        """
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            task.get_loop().call_exception_handler(
+                {
+                    "message": "Game scheduler callback failed",
+                    "exception": task.exception(),
+                    "task": task,
+                }
+            )
+
+    async def stop(self) -> None:
+        """
+        Cancel the pending timers and the running callbacks.
+        """
+        self._heap.clear()
+        tasks = list(self._running)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        loop = asyncio.get_running_loop()
+        tasks = [task for task in tasks if task.get_loop() is loop]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._running.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the scheduler counters.
+        :return: the number of pending timers, of running callbacks and of
+            fired timers
+        """
+        return {
+            "timers": len(self._heap),
+            "running": len(self._running),
+            "fired": self.fired,
+        }
+
+
+game_scheduler = GameScheduler()
@@ -0,0 +1,98 @@
+from typing import Any, Optional
+
+import httpx
+
+from ..config import settings
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClient:
+    """
+    Application-scoped async HTTP client for the upstream services. All
+    callers share one connection pool, so connections are kept alive
+    between requests instead of paying a new TCP and TLS handshake every
+    time, and HTTP/2 is negotiated when the h2 package is installed.
+    The client is opened at startup and closed at shutdown; a call before
+    startup opens it lazily.
+    :param max_connections: - the maximum number of open connections
+    :param max_keepalive_connections: - the maximum number of idle connections
+    :param keepalive_expiry: - the seconds an idle connection is kept open
+    :param connect_timeout: - the seconds to wait for a connection
+    :param timeout: - the seconds to wait for a read, a write or a free
+        connection of the pool
+    :param http2: - negotiate HTTP/2 if it is available
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 3.0,
+        timeout: float = 10.0,
+        http2: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Get the shared client, opening it on the first use.
+        :return: the client
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send a GET request over the shared connection pool.
+        :param url: - the url
+        :param kwargs: - the extra arguments of httpx.AsyncClient.get
+        :return: the response
+        :raises httpx.HTTPError: if the request fails
+        """
+        return await self.client.get(url, **kwargs)
+
+    def start(self) -> None:
+        """
+        Open the shared client.
+        """
+        self._client = self.client
+
+    async def stop(self) -> None:
+        """
+        Close the shared client and its connections.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_client = HTTPClient(
+    max_connections=settings.server.http_max_connections,
+    max_keepalive_connections=settings.server.http_max_keepalive_connections,
+    keepalive_expiry=settings.server.http_keepalive_expiry,
+    connect_timeout=settings.server.http_connect_timeout,
+    timeout=settings.server.http_timeout,
+    http2=settings.server.http2,
+)
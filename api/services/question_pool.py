@@ -0,0 +1,212 @@
+import asyncio
+from collections import OrderedDict, deque
+from functools import partial
+from typing import Deque, Dict, Tuple
+
+import httpx
+
+from ..config import settings
+from ..utils.parse_url import parse_url
+from .game_room import GameQuestion, compile_question
+from .quiz_api import QuizApiUnavailableError, quiz_api
+
+QUESTION_OPTIONS = ("categories", "difficulty", "limit", "tags")
+
+PoolKey = Tuple[Tuple[str, str], ...]
+Batch = Tuple[GameQuestion, ...]
+
+
+def pool_key(options: dict) -> PoolKey:
+    """
+    Normalize the game options sent to the quiz api, so games asking for the
+    same questions share a pool regardless of the order of the categories
+    and tags or of the player options.
+    :param options: - the options for the game
+    :return: the sorted query parameters
+    """
+    params = []
+    for name in QUESTION_OPTIONS:
+        value = options.get(name)
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.split(",")
+        if isinstance(value, list):
+            value = ",".join(sorted(set(value)))
+        params.append((name, str(value)))
+    return tuple(params)
+
+
+class QuestionPool:
+    """
+    Ready batches of questions from the quiz api, keyed by the normalized
+    game options. Starting a game pops a batch from memory and a background
+    task fetches the next ones, up to the pool depth, so players do not wait
+    for the quiz api. The pool fetches the questions live only on a miss,
+    e.g. for the first game with given options, and concurrent misses for
+    the same options share one request. The least recently used options
+    are dropped when there are too many. The questions are compiled once
+    and shared by the games, which only pick their own answer order.
+    :param depth: - the number of ready batches per options
+    :param max_keys: - the maximum number of pooled options
+    """
+
+    def __init__(self, depth: int = 2, max_keys: int = 64):
+        self.depth = depth
+        self.max_keys = max_keys
+        self.batches: "OrderedDict[PoolKey, Deque[Batch]]"
+        self.batches = OrderedDict()
+        self._refilling: Dict[PoolKey, asyncio.Task] = {}
+        self._fetching: Dict[PoolKey, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def fetch(self, key: PoolKey) -> Batch:
+        """
+        Fetch a batch of questions from the quiz api.
+        :param key: - the normalized game options
+        :return: the questions
+        :raises QuizApiUnavailableError: if the quiz api is unavailable
+        :raises httpx.HTTPError: if the request fails
+        """
+        result = await quiz_api.get(parse_url("/questions", dict(key)))
+        result.raise_for_status()
+        return tuple(
+            compile_question(
+                q["question"], q["correctAnswer"], q["incorrectAnswers"]
+            )
+            for q in result.json()
+        )
+
+    async def get(self, options: dict) -> Batch:
+        """
+        Get a batch of questions for the game and refill the pool.
+        :param options: - the options for the game
+        :return: the compiled questions, shared by the games
+        :raises QuizApiUnavailableError: if the pool is empty and the quiz
+            api is unavailable
+        :raises httpx.HTTPError: if the pool is empty and the request fails
+        :raises ValueError: if the quiz api sends an invalid body
+        """
+        key = pool_key(options)
+        batches = self.batches.get(key)
+        if batches:
+            self.hits += 1
+            self.batches.move_to_end(key)
+            batch = batches.popleft()
+        else:
+            self.misses += 1
+            batch = await self.fetch_shared(key)
+            if key not in self.batches:
+                self.batches[key] = deque()
+                while len(self.batches) > self.max_keys:
+                    evicted, _ = self.batches.popitem(last=False)
+                    task = self._refilling.pop(evicted, None)
+                    if task is not None:
+                        task.cancel()
+        self.refill(key)
+        return batch
+
+    async def fetch_shared(self, key: PoolKey) -> Batch:
+        """
+        Fetch a batch of questions, sharing the request in flight with the
+        concurrent games asking for the same options.
+        :param key: - the normalized game options
+        :return: the questions, shared with the other waiters
+        """
+        task = self._fetching.get(key)
+        if task is None:
+            task = asyncio.create_task(self.fetch(key))
+            self._fetching[key] = task
+            task.add_done_callback(partial(self._fetched, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _fetched(self, key: PoolKey, task: asyncio.Task) -> None:
+        """
+        Forget the finished request, so the next miss fetches again.
+        :param key: - the normalized game options
+        :param task: - the finished request
+        """
+        if self._fetching.get(key) is task:
+            del self._fetching[key]
+        if not task.cancelled():
+            task.exception()  # retrieved even if every waiter went away
+
+    def refill(self, key: PoolKey) -> None:
+        """
+        Fetch batches in the background until the pool of the options is
+        full, with at most one task per options.
+        :param key: - the normalized game options
+        """
+        task = self._refilling.get(key)
+        if self.depth > 0 and (task is None or task.done()):
+            self._refilling[key] = asyncio.create_task(self._refill(key))
+
+    async def _refill(self, key: PoolKey) -> None:
+        """
+        Fill the pool of the options, stopping at the first failure.
+        :param key: - the normalized game options
+        """
+        while key in self.batches and len(self.batches[key]) < self.depth:
+            try:
+                batch = await self.fetch(key)
+            except (
+                QuizApiUnavailableError,
+                httpx.HTTPError,
+                ValueError,
+                KeyError,
+            ):
+                self.failures += 1
+                return
+            batches = self.batches.get(key)
+            if batches is None:  # the options were evicted meanwhile
+                return
+            batches.append(batch)
+
+    async def stop(self) -> None:
+        """
+        Cancel the background refills and the requests in flight.
+        """
+        tasks = [*self._refilling.values(), *self._fetching.values()]
+        self._refilling.clear()
+        self._fetching.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def clear(self) -> None:
+        """
+        Drop all batches and reset the counters.
+        """
+        self.batches.clear()
+        self._refilling.clear()
+        self._fetching.clear()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the pool counters.
+        :return: the number of pooled options and ready batches, hits,
+            misses, misses sharing a request in flight and failed refills
+        """
+        return {
+            "size": len(self.batches),
+            "batches": sum(len(b) for b in self.batches.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+        }
+
+
+question_pool = QuestionPool(
+    depth=settings.question_pool.depth,
+    max_keys=settings.question_pool.max_keys,
+)
@@ -0,0 +1,172 @@
+import asyncio
+from collections import deque
+from time import monotonic
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+from ..config import settings
+from ..utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from .http_client import http_client
+
+
+class QuizApiUnavailableError(CircuitOpenError):
+    """
+    Raised when the calls to the quiz api are rejected by the open circuit.
+    """
+
+
+class QuizApi:
+    """
+    Client of the upstream quiz api, guarded by a circuit breaker. Timeouts,
+    connection errors and 5xx responses count as failures; once the failure
+    rate is too high, calls fail fast until the circuit lets a probe through.
+    A request slower than the given percentile of the recent latencies is
+    hedged with a second identical request and the first response wins.
+    :param url: - the base url of the quiz api
+    :param breaker: - the circuit breaker
+    :param hedge: - send hedged requests
+    :param hedge_percentile: - the latency percentile after which to hedge
+    :param hedge_min_delay: - the minimum seconds before hedging
+    :param hedge_min_samples: - the latencies needed before hedging
+    """
+
+    def __init__(
+        self,
+        url: str,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = True,
+        hedge_percentile: float = 0.95,
+        hedge_min_delay: float = 0.2,
+        hedge_min_samples: int = 20,
+    ):
+        self.url = url
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies: Deque[float] = deque(maxlen=100)
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Get the seconds after which a request is hedged.
+        :return: the delay or None when hedging is off or not enough
+            latencies are known
+        """
+        if not self.hedge or len(self.latencies) < self.hedge_min_samples:
+            return None
+        latencies = sorted(self.latencies)
+        index = min(
+            int(len(latencies) * self.hedge_percentile), len(latencies) - 1
+        )
+        return max(latencies[index], self.hedge_min_delay)
+
+    async def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send a GET request to the quiz api.
+        :param path: - the path, e.g. "/categories"
+        :param kwargs: - the extra arguments of httpx.AsyncClient.get
+        :return: the response
+        :raises QuizApiUnavailableError: if the circuit is open
+        :raises httpx.HTTPError: if the request fails
+        """
+        try:
+            self.breaker.allow()
+        except CircuitOpenError as err:
+            raise QuizApiUnavailableError(str(err)) from err
+        try:
+            response = await self._hedged(self.url + path, kwargs)
+        except httpx.HTTPError:
+            self.breaker.record(False)
+            raise
+        except asyncio.CancelledError:
+            self.breaker.cancel()
+            raise
+        self.breaker.record(response.status_code < 500)
+        return response
+
+    async def _send(self, url: str, kwargs: Dict) -> httpx.Response:
+        """
+        Send one request and record its latency.
+        :param url: - the url
+        :param kwargs: - the extra arguments of httpx.AsyncClient.get
+        :return: the response
+        """
+        start = monotonic()
+        response = await http_client.get(url, **kwargs)
+        if response.status_code < 500:
+            self.latencies.append(monotonic() - start)
+        return response
+
+    async def _hedged(self, url: str, kwargs: Dict) -> httpx.Response:
+        """
+        Send the request and a hedged copy if the first one is slow.
+        :param url: - the url
+        :param kwargs: - the extra arguments of httpx.AsyncClient.get
+        :return: the first successful response
+        """
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._send(url, kwargs)
+        first = asyncio.create_task(self._send(url, kwargs))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedges += 1
+                tasks.add(asyncio.create_task(self._send(url, kwargs)))
+            while True:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                succeeded = [t for t in done if t.exception() is None]
+                if succeeded:
+                    if succeeded[0] is not first:
+                        self.hedge_wins += 1
+                    return succeeded[0].result()
+                if not tasks:  # every request failed
+                    return done.pop().result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def reset(self) -> None:
+        """
+        Close the circuit and forget the latencies and counters.
+        """
+        self.breaker.reset()
+        self.latencies.clear()
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the breaker state and the hedging counters.
+        :return: the breaker stats, the hedge delay, the number of hedged
+            requests and of hedged requests answering first
+        """
+        return {
+            **self.breaker.stats(),
+            "hedge_delay": self.hedge_delay(),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+quiz_api = QuizApi(
+    settings.server.quiz_api,
+    breaker=CircuitBreaker(
+        window=settings.quiz_api.breaker_window,
+        failure_rate=settings.quiz_api.breaker_failure_rate,
+        min_calls=settings.quiz_api.breaker_min_calls,
+        open_timeout=settings.quiz_api.breaker_open_timeout,
+        half_open_calls=settings.quiz_api.breaker_half_open_calls,
+    ),
+    hedge=settings.quiz_api.hedge,
+    hedge_percentile=settings.quiz_api.hedge_percentile,
+    hedge_min_delay=settings.quiz_api.hedge_min_delay,
+    hedge_min_samples=settings.quiz_api.hedge_min_samples,
+)
@@ -0,0 +1,482 @@
+from abc import ABC, abstractmethod
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from math import inf
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from firebase_admin import db
+from firebase_admin.exceptions import FirebaseError
+
+from ..config import settings
+from ..utils.cache import TTLCache
+from ..utils.etag import compute_etag, match_etag
+from ..utils.projection import quiz_summary
+from ..utils.push_id import push_id
+
+
+class RepositoryError(Exception):
+    """
+    Raised when the database cannot complete the requested operation.
+    """
+
+
+class NicknameTakenError(RepositoryError):
+    """
+    Raised when the nickname is already used by another user.
+    """
+
+
+class QuizModifiedError(RepositoryError):
+    """
+    Raised when the quiz no longer matches the ETag of a conditional update.
+    """
+
+
+def quiz_matches(quiz: Optional[Dict], if_match: str) -> bool:
+    """
+    Check if the stored quiz still matches the If-Match header.
+    :param quiz: - the stored quiz or None
+    :param if_match: - the If-Match header
+    :return: True if the quiz exists and its ETag is listed in the header
+    """
+    return quiz is not None and match_etag(if_match, compute_etag(quiz))
+
+
+def quiz_version(quiz: Dict) -> str:
+    """
+    Get the ETag of the quiz as it is stored, without its null fields.
+    :param quiz: - the quiz
+    :return: the ETag
+    """
+    return compute_etag({k: v for k, v in quiz.items() if v is not None})
+
+
+class Repository(ABC):
+    """
+    Async interface for the users and quizzes storage.
+    Storage backends implement the abstract blocking operations, including
+    the rebuild of their secondary indexes, which are executed on
+    a bounded worker pool so the event loop stays free while the database is
+    slow. Users are cached by uid, so the existence check done by almost every
+    endpoint is served from memory.
+    :param max_workers: - the maximum number of concurrent database calls
+    :param users_cache_size: - the maximum number of cached users
+    :param users_cache_ttl: - the time to live of a cached user in seconds
+    """
+
+    errors: Tuple[Type[Exception], ...] = ()
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        users_cache_size: int = 1024,
+        users_cache_ttl: float = 60.0,
+    ):
+        self.max_workers = max_workers
+        self.users = TTLCache(maxsize=users_cache_size, ttl=users_cache_ttl)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pinned: Dict[str, int] = {}
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        """
+        Run a blocking database call on the worker pool.
+        :param func: - the blocking function
+        :param args: - the arguments for the function
+        :return: the result of the function
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="repository"
+            )
+        try:
+            return await get_running_loop().run_in_executor(
+                self._executor, partial(func, *args)
+            )
+        except self.errors as err:
+            raise RepositoryError(str(err)) from err
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker pool. It is created again on the next call.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @abstractmethod
+    def _find_user(self, child: str, value: str) -> Optional[Tuple[str, Dict]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _create_user(self, user: Dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _reindex(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _update_user(self, key: str, user: Dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _get_user_quizzes(
+        self, uid: str, limit: Optional[int], cursor: Optional[str]
+    ) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _get_quiz_summaries(
+        self, uid: str, limit: Optional[int], cursor: Optional[str]
+    ) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _get_quiz(self, quiz_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _create_quiz(self, quiz: Dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _update_quiz(
+        self,
+        quiz_id: str,
+        changes: Dict,
+        quiz: Dict,
+        if_match: Optional[str],
+    ) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _delete_quizzes(self, uid: str, quiz_ids: List[str]) -> None:
+        raise NotImplementedError
+
+    async def get_user(self, uid: str) -> Optional[Tuple[str, Dict]]:
+        """
+        Get the user with the given uid.
+        :param uid: - the uid of the user
+        :return: the key and the details of the user or None
+        """
+        user_details = self.users.get(uid)
+        if user_details is None:
+            user_details = await self._run(self._find_user, "uid", uid)
+            if user_details is not None:
+                ttl = inf if uid in self._pinned else None
+                self.users.set(uid, user_details, ttl=ttl)
+        return user_details
+
+    async def pin_user(self, uid: str) -> None:
+        """
+        Keep the user cached while one of its sessions is connected, so a
+        game lasting longer than the cache ttl still reads it from memory.
+        :param uid: - the uid of the user
+        """
+        self._pinned[uid] = self._pinned.get(uid, 0) + 1
+        user_details = await self.get_user(uid)
+        if user_details is not None:
+            self.users.set(uid, user_details, ttl=inf)
+
+    def unpin_user(self, uid: str) -> None:
+        """
+        Let the user expire once the last of its sessions is disconnected.
+        :param uid: - the uid of the user
+        """
+        count = self._pinned.pop(uid, 0) - 1
+        if count > 0:
+            self._pinned[uid] = count
+        else:
+            self.users.pop(uid)
+
+    async def create_user(self, user: Dict) -> None:
+        """
+        Store a new user. The nickname is reserved atomically with the write,
+        so two users can never get the same nickname.
+        :param user: - the details of the user
+        :raises NicknameTakenError: if the nickname is already taken
+        """
+        await self._run(self._create_user, user)
+        self.users.pop(user["uid"])
+
+    async def update_user(self, key: str, user: Dict) -> None:
+        """
+        Overwrite the user stored under the given key.
+        :param key: - the database key of the user
+        :param user: - the details of the user
+        """
+        await self._run(self._update_user, key, user)
+        self.users.pop(user["uid"])
+
+    async def reindex(self) -> None:
+        """
+        Rebuild the secondary indexes from the stored records.
+        """
+        await self._run(self._reindex)
+
+    async def get_user_quizzes(
+        self,
+        uid: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Get the quizzes created by the user, ordered by quiz id.
+        :param uid: - the uid of the user
+        :param limit: - the maximum number of quizzes, all when None
+        :param cursor: - return only quizzes with a greater quiz id
+        :return: the quizzes keyed by quiz id
+        """
+        return (
+            await self._run(self._get_user_quizzes, uid, limit, cursor) or {}
+        )
+
+    async def get_quiz_summaries(
+        self,
+        uid: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Get the summaries of the quizzes created by the user from the user
+        quiz index, ordered by quiz id.
+        :param uid: - the uid of the user
+        :param limit: - the maximum number of summaries, all when None
+        :param cursor: - return only summaries with a greater quiz id
+        :return: the summaries keyed by quiz id
+        """
+        return (
+            await self._run(self._get_quiz_summaries, uid, limit, cursor) or {}
+        )
+
+    async def get_quiz(self, quiz_id: str) -> Optional[Dict]:
+        """
+        Get the quiz with the given id.
+        :param quiz_id: - the quiz id
+        :return: the quiz or None
+        """
+        return await self._run(self._get_quiz, quiz_id)
+
+    async def create_quiz(self, quiz: Dict) -> None:
+        """
+        Store a new quiz together with its summary.
+        :param quiz: - the quiz
+        """
+        await self._run(self._create_quiz, quiz)
+
+    async def update_quiz(
+        self,
+        quiz_id: str,
+        changes: Dict,
+        quiz: Dict,
+        if_match: Optional[str] = None,
+    ) -> None:
+        """
+        Write only the changed fields of the quiz with the given id and
+        refresh its summary. With If-Match, the ETag of the stored quiz is
+        compared atomically with the write.
+        :param quiz_id: - the quiz id
+        :param changes: - the changed fields, None removes the field
+        :param quiz: - the quiz after the changes
+        :param if_match: - the If-Match header or None
+        :raises QuizModifiedError: if the quiz does not match If-Match
+        """
+        if len(changes) > 0:
+            await self._run(
+                self._update_quiz, quiz_id, changes, quiz, if_match
+            )
+
+    async def delete_quizzes(self, uid: str, quiz_ids: List[str]) -> None:
+        """
+        Delete many quizzes of the user and their summaries with a single
+        write.
+        :param uid: - the uid of the owner
+        :param quiz_ids: - the quiz ids
+        """
+        if len(quiz_ids) > 0:
+            await self._run(self._delete_quizzes, uid, quiz_ids)
+
+    async def delete_quiz(self, uid: str, quiz_id: str) -> None:
+        """
+        Delete the quiz of the user with the given id.
+        :param uid: - the uid of the owner
+        :param quiz_id: - the quiz id
+        """
+        await self.delete_quizzes(uid, [quiz_id])
+
+
+def _nickname_key(nickname: str) -> str:
+    """
+    Escape the nickname, so it can be used as a Firebase key.
+    :param nickname: - the nickname
+    :return: the key
+    """
+    return nickname.replace(".", "%2E")
+
+
+class FirebaseRepository(Repository):
+    """
+    Users and quizzes stored in Firebase Realtime Database.
+    Nicknames are reserved in the Nicknames/<nickname> -> uid index and
+    quiz summaries are kept in UserQuizIndex/<uid>/<quiz_id>, written with
+    the quiz in one multi-location update. The ETag of every quiz is kept in
+    QuizVersions/<quiz_id>, so a conditional update runs its transaction on
+    that small value instead of the whole quiz.
+    """
+
+    errors = (FirebaseError,)
+
+    def _find_user(self, child: str, value: str) -> Optional[Tuple[str, Dict]]:
+        user_details = (
+            db.reference("Users")
+            .order_by_child(child)
+            .equal_to(value)
+            .limit_to_first(1)
+            .get()
+        )
+        if user_details is None:
+            return None
+        return next(iter(user_details.items()), None)
+
+    def _create_user(self, user: Dict) -> None:
+        nickname = db.reference("Nicknames").child(
+            _nickname_key(user["nickname"])
+        )
+
+        def reserve(uid: Optional[str]) -> str:
+            if uid is not None and uid != user["uid"]:
+                raise NicknameTakenError(user["nickname"])
+            return user["uid"]
+
+        nickname.transaction(reserve)
+        try:
+            db.reference("Users").child(push_id()).set(user)
+        except FirebaseError:
+            nickname.delete()
+            raise
+
+    def _reindex(self) -> None:
+        users = db.reference("Users").get() or {}
+        quizzes = db.reference("Quizzes").get() or {}
+        index = {
+            f"Nicknames/{_nickname_key(user['nickname'])}": user["uid"]
+            for user in users.values()
+        }
+        for quiz_id, quiz in quizzes.items():
+            index[f"UserQuizIndex/{quiz['uid']}/{quiz_id}"] = quiz_summary(
+                quiz
+            )
+            index[f"QuizVersions/{quiz_id}"] = quiz_version(quiz)
+        if len(index) > 0:
+            db.reference().update(index)
+
+    def _update_user(self, key: str, user: Dict) -> None:
+        db.reference("Users").child(key).set(user)
+
+    def _get_user_quizzes(
+        self, uid: str, limit: Optional[int], cursor: Optional[str]
+    ) -> Dict[str, Dict]:
+        if limit is None and cursor is None:
+            return (
+                db.reference("Quizzes")
+                .order_by_child("uid")
+                .equal_to(uid)
+                .get()
+            )
+        # page the user quiz index and read only the quizzes of the page
+        quizzes = db.reference("Quizzes")
+        page: Dict[str, Dict] = {}
+        for quiz_id in self._get_quiz_summaries(uid, limit, cursor):
+            quiz = quizzes.child(quiz_id).get()
+            if quiz is not None:
+                page[quiz_id] = quiz
+        return page
+
+    def _get_quiz_summaries(
+        self, uid: str, limit: Optional[int], cursor: Optional[str]
+    ) -> Dict[str, Dict]:
+        query = db.reference("UserQuizIndex").child(uid).order_by_key()
+        if cursor is not None:
+            # start_at is inclusive, so the cursor itself is read and dropped
+            query = query.start_at(cursor)
+        if limit is not None:
+            query = query.limit_to_first(limit + int(cursor is not None))
+        summaries = query.get() or {}
+        summaries.pop(cursor, None)
+        return dict(list(summaries.items())[:limit])
+
+    def _get_quiz(self, quiz_id: str) -> Optional[Dict]:
+        try:
+            return db.reference("Quizzes").child(quiz_id).get()
+        except ValueError:  # quiz id is not a valid database key
+            return None
+
+    def _create_quiz(self, quiz: Dict) -> None:
+        quiz_id = push_id()
+        db.reference().update(
+            {
+                f"Quizzes/{quiz_id}": quiz,
+                f"UserQuizIndex/{quiz['uid']}/{quiz_id}": quiz_summary(quiz),
+                f"QuizVersions/{quiz_id}": quiz_version(quiz),
+            }
+        )
+
+    def _update_quiz(
+        self,
+        quiz_id: str,
+        changes: Dict,
+        quiz: Dict,
+        if_match: Optional[str],
+    ) -> None:
+        version = quiz_version(quiz)
+        update = {f"Quizzes/{quiz_id}/{k}": v for k, v in changes.items()}
+        update[f"UserQuizIndex/{quiz['uid']}/{quiz_id}"] = quiz_summary(quiz)
+        update[f"QuizVersions/{quiz_id}"] = version
+        if if_match is not None:
+
+            def claim(stored: Optional[str]) -> str:
+                if stored is None:  # quiz stored before the versions
+                    quiz_ref = db.reference("Quizzes").child(quiz_id)
+                    matches = quiz_matches(quiz_ref.get(), if_match)
+                else:
+                    matches = match_etag(if_match, stored)
+                if not matches:
+                    raise QuizModifiedError(quiz_id)
+                return version
+
+            # of the writers sharing an ETag only the first claims the new
+            # version, the others fail here before writing any field
+            db.reference("QuizVersions").child(quiz_id).transaction(claim)
+        db.reference().update(update)
+
+    def _delete_quizzes(self, uid: str, quiz_ids: List[str]) -> None:
+        update: Dict[str, Any] = {}
+        for quiz_id in quiz_ids:
+            update[f"Quizzes/{quiz_id}"] = None
+            update[f"UserQuizIndex/{uid}/{quiz_id}"] = None
+            update[f"QuizVersions/{quiz_id}"] = None
+        db.reference().update(update)
+
+
+def create_repository() -> Repository:
+    """
+    Create the repository for the storage backend selected in the settings.
+    :return: the repository
+    """
+    backend = settings.database.get("backend", "firebase")
+    options = dict(
+        max_workers=settings.database.max_workers,
+        users_cache_size=settings.database.users_cache_size,
+        users_cache_ttl=settings.database.users_cache_ttl,
+    )
+    if backend == "firebase":
+        return FirebaseRepository(**options)
+    elif backend == "sqlite":
+        from .sqlite_repository import SQLiteRepository
+
+        return SQLiteRepository(path=settings.database.sqlite_path, **options)
+    raise ValueError(f"Unknown database backend {backend}")
+
+
+repository = create_repository()
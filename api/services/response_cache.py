@@ -0,0 +1,132 @@
+from typing import Any, Dict, NamedTuple, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+from ..config import settings
+from ..utils.cache import TTLCache
+from ..utils.etag import compute_etag, match_etag
+
+
+class CachedResponse(NamedTuple):
+    """
+    Serialized JSON body together with its strong ETag and extra headers.
+    """
+
+    body: bytes
+    etag: str
+    headers: Optional[Dict[str, str]] = None
+
+    def response(self, if_none_match: Optional[str] = None) -> Response:
+        """
+        Build the response, which is empty when the client already has
+        the current version of the body.
+        :param if_none_match: - the If-None-Match header
+        :return: the 200 or 304 response
+        """
+        if match_etag(if_none_match, self.etag, weak=True):
+            return Response(
+                status_code=HTTP_304_NOT_MODIFIED,
+                headers={"ETag": self.etag},
+            )
+        return Response(
+            content=self.body,
+            media_type="application/json",
+            headers={**(self.headers or {}), "ETag": self.etag},
+        )
+
+
+class ResponseCache:
+    """
+    Serialized bodies of the frequently polled endpoints. A cached body is
+    sent as it is, so repeated requests neither touch the database nor
+    encode the JSON again. Every key holds the variants of one resource,
+    e.g. its pages, which are all dropped by the routes changing the data.
+    Entries also expire after a time to live, which bounds staleness across
+    processes.
+    :param maxsize: - the maximum number of cached resources
+    :param ttl: - the time to live of a cached resource in seconds
+    :param max_variants: - the maximum number of variants of a resource
+    """
+
+    def __init__(
+        self, maxsize: int = 1024, ttl: float = 30.0, max_variants: int = 32
+    ):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.max_variants = max_variants
+
+    def get(self, key: str, variant: str = "") -> Optional[CachedResponse]:
+        """
+        Get the cached body.
+        :param key: - the cache key
+        :param variant: - the variant of the resource, e.g. the query string
+        :return: the cached body or None
+        """
+        variants = self.entries.get(key)
+        return None if variants is None else variants.get(variant)
+
+    def set(
+        self,
+        key: str,
+        content: Any,
+        variant: str = "",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> CachedResponse:
+        """
+        Serialize the content once and cache it with its ETag.
+        :param key: - the cache key
+        :param content: - the JSON serializable content
+        :param variant: - the variant of the resource, e.g. the query string
+        :param headers: - the extra headers sent with the body
+        :return: the cached body
+        """
+        body = JSONResponse(content=jsonable_encoder(content)).body
+        cached = CachedResponse(
+            body=body, etag=compute_etag(body), headers=headers
+        )
+        variants = self.entries.get(key)
+        if variants is None:
+            variants = {}
+            self.entries.set(key, variants)
+        variants[variant] = cached
+        while len(variants) > self.max_variants:
+            del variants[next(iter(variants))]
+        return cached
+
+    def invalidate(self, key: str) -> None:
+        """
+        Drop all variants of the resource after the data has changed.
+        :param key: - the cache key
+        """
+        self.entries.pop(key)
+
+    def clear(self) -> None:
+        """
+        Drop all cached bodies.
+        """
+        self.entries.clear()
+
+
+def user_key(uid: str) -> str:
+    """
+    Get the cache key of the user details.
+    :param uid: - the uid of the user
+    :return: the cache key
+    """
+    return f"users/{uid}"
+
+
+def quizzes_key(uid: str) -> str:
+    """
+    Get the cache key of the user's quizzes.
+    :param uid: - the uid of the user
+    :return: the cache key
+    """
+    return f"quizzes/{uid}"
+
+
+response_cache = ResponseCache(
+    maxsize=settings.cache.responses_size,
+    ttl=settings.cache.responses_ttl,
+)
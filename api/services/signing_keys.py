@@ -0,0 +1,114 @@
+import asyncio
+import re
+from time import monotonic
+from typing import Dict, Optional
+
+import httpx
+from google.auth.crypt import RSAVerifier
+
+from ..utils.id_token import parse_certificates
+from .http_client import http_client
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class SigningKeys:
+    """
+    Public keys signing the Firebase ID tokens, kept in memory and refreshed
+    by a background task ahead of their expiry, so verifying a token never
+    waits for the key server.
+    :param url: - the url of the public certificates
+    :param refresh_margin: - refresh this many seconds before the expiry
+    :param retry_interval: - the seconds between retries after a failure
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_margin: float = 300.0,
+        retry_interval: float = 10.0,
+    ):
+        self.url = url
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.verifiers: Dict[str, RSAVerifier] = {}
+        self.expires_at = 0.0
+        self.refreshes = 0
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self._attempted_at = float("-inf")
+
+    async def refresh(self) -> float:
+        """
+        Fetch the certificates. Concurrent callers share a single request.
+        :return: the seconds for which the certificates are valid
+        """
+        if self._refreshing is None or self._refreshing.done():
+            self._attempted_at = monotonic()
+            self._refreshing = asyncio.create_task(self._fetch())
+        return await asyncio.shield(self._refreshing)
+
+    async def _fetch(self) -> float:
+        """
+        Fetch and parse the certificates.
+        :return: the seconds for which the certificates are valid
+        """
+        response = await http_client.get(self.url)
+        response.raise_for_status()
+        verifiers = parse_certificates(response.json())
+        match = MAX_AGE.search(response.headers.get("cache-control", ""))
+        max_age = float(match.group(1)) if match else 0.0
+        self.verifiers = verifiers
+        self.expires_at = monotonic() + max_age
+        self.refreshes += 1
+        return max_age
+
+    async def _refresh_forever(self) -> None:
+        """
+        Refresh the certificates shortly before they expire.
+        """
+        while True:
+            try:
+                max_age = await self.refresh()
+                delay = max(max_age - self.refresh_margin, self.retry_interval)
+            except (httpx.HTTPError, ValueError):
+                delay = self.retry_interval
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        """
+        Start the background refresh on the running event loop.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self) -> None:
+        """
+        Stop the background refresh.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def get(self, kid: str) -> Dict[str, RSAVerifier]:
+        """
+        Get the verifiers, fetching them first when the key id is unknown,
+        e.g. before the first refresh or right after a key rotation. Unknown
+        key ids wait for the running fetch or start at most one fetch per
+        retry interval.
+        :param kid: - the key id from the token header
+        :return: the verifiers keyed by key id
+        """
+        fetching = self._refreshing is not None and not self._refreshing.done()
+        if kid not in self.verifiers and (
+            fetching or monotonic() - self._attempted_at >= self.retry_interval
+        ):
+            try:
+                await self.refresh()
+            except (httpx.HTTPError, ValueError):
+                pass
+        return self.verifiers
@@ -0,0 +1,212 @@
+import sqlite3
+from contextlib import contextmanager
+from json import dumps, loads
+from threading import local
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..utils.projection import quiz_summary
+from ..utils.push_id import push_id
+from .repository import (
+    NicknameTakenError,
+    QuizModifiedError,
+    Repository,
+    quiz_matches,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    key TEXT PRIMARY KEY,
+    uid TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_uid ON users (uid);
+CREATE UNIQUE INDEX IF NOT EXISTS users_nickname ON users (nickname);
+CREATE TABLE IF NOT EXISTS quizzes (
+    key TEXT PRIMARY KEY,
+    uid TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quizzes_uid ON quizzes (uid, key);
+CREATE TABLE IF NOT EXISTS quiz_summaries (
+    key TEXT PRIMARY KEY,
+    uid TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quiz_summaries_uid ON quiz_summaries (uid, key);
+"""
+
+USER_COLUMNS = {"uid": "uid", "nickname": "nickname"}
+
+
+def _compact(data: Dict) -> Dict:
+    """
+    Drop the empty fields, like Firebase does when storing null values.
+    :param data: - the record
+    :return: the record without None values
+    """
+    return {k: v for k, v in data.items() if v is not None}
+
+
+class SQLiteRepository(Repository):
+    """
+    Users and quizzes stored in a local SQLite database in WAL mode.
+    It does not need the network, so it is used for load testing and
+    self-hosting. Every worker thread keeps its own connection.
+    :param path: - the path to the database file
+    """
+
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path: str = "contentapi.db", **kwargs):
+        super(SQLiteRepository, self).__init__(**kwargs)
+        self.path = path
+        self._local = local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get the connection of the current thread.
+        :return: the connection
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run the statements in a write transaction of the current thread.
+        :return: the connection
+        """
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _find_user(self, child: str, value: str) -> Optional[Tuple[str, Dict]]:
+        row = self.connection.execute(
+            f"SELECT key, data FROM users WHERE {USER_COLUMNS[child]} = ?",
+            (value,),
+        ).fetchone()
+        return None if row is None else (row[0], loads(row[1]))
+
+    def _create_user(self, user: Dict) -> None:
+        try:
+            self.connection.execute(
+                "INSERT INTO users (key, uid, nickname, data) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    push_id(),
+                    user["uid"],
+                    user["nickname"],
+                    dumps(_compact(user)),
+                ),
+            )
+        except sqlite3.IntegrityError as err:
+            if "users.nickname" in str(err):
+                raise NicknameTakenError(user["nickname"]) from err
+            raise
+
+    def _update_user(self, key: str, user: Dict) -> None:
+        self.connection.execute(
+            "UPDATE users SET uid = ?, nickname = ?, data = ? WHERE key = ?",
+            (user["uid"], user["nickname"], dumps(_compact(user)), key),
+        )
+
+    def _get_user_quizzes(
+        self, uid: str, limit: Optional[int], cursor: Optional[str]
+    ) -> Dict[str, Dict]:
+        rows = self.connection.execute(
+            "SELECT key, data FROM quizzes WHERE uid = ? AND key > ? "
+            "ORDER BY key LIMIT ?",
+            (uid, cursor or "", -1 if limit is None else limit),
+        )
+        return {key: loads(data) for key, data in rows}
+
+    def _get_quiz_summaries(
+        self, uid: str, limit: Optional[int], cursor: Optional[str]
+    ) -> Dict[str, Dict]:
+        rows = self.connection.execute(
+            "SELECT key, data FROM quiz_summaries WHERE uid = ? AND key > ? "
+            "ORDER BY key LIMIT ?",
+            (uid, cursor or "", -1 if limit is None else limit),
+        )
+        return {key: loads(data) for key, data in rows}
+
+    def _get_quiz(self, quiz_id: str) -> Optional[Dict]:
+        row = self.connection.execute(
+            "SELECT data FROM quizzes WHERE key = ?", (quiz_id,)
+        ).fetchone()
+        return None if row is None else loads(row[0])
+
+    def _create_quiz(self, quiz: Dict) -> None:
+        quiz_id = push_id()
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT INTO quizzes (key, uid, data) VALUES (?, ?, ?)",
+                (quiz_id, quiz["uid"], dumps(_compact(quiz))),
+            )
+            connection.execute(
+                "INSERT INTO quiz_summaries (key, uid, data) VALUES (?, ?, ?)",
+                (quiz_id, quiz["uid"], dumps(quiz_summary(quiz))),
+            )
+
+    def _update_quiz(
+        self,
+        quiz_id: str,
+        changes: Dict,
+        quiz: Dict,
+        if_match: Optional[str],
+    ) -> None:
+        with self.transaction() as connection:
+            row = connection.execute(
+                "SELECT data FROM quizzes WHERE key = ?", (quiz_id,)
+            ).fetchone()
+            if if_match is not None and not quiz_matches(
+                None if row is None else loads(row[0]), if_match
+            ):
+                raise QuizModifiedError(quiz_id)
+            if row is not None:
+                quiz = _compact({**loads(row[0]), **changes})
+                connection.execute(
+                    "UPDATE quizzes SET uid = ?, data = ? WHERE key = ?",
+                    (quiz["uid"], dumps(quiz), quiz_id),
+                )
+                connection.execute(
+                    "UPDATE quiz_summaries SET data = ? WHERE key = ?",
+                    (dumps(quiz_summary(quiz)), quiz_id),
+                )
+
+    def _delete_quizzes(self, uid: str, quiz_ids: List[str]) -> None:
+        with self.transaction() as connection:
+            for table in ("quizzes", "quiz_summaries"):
+                connection.executemany(
+                    f"DELETE FROM {table} WHERE key = ? AND uid = ?",
+                    [(quiz_id, uid) for quiz_id in quiz_ids],
+                )
+
+    def _reindex(self) -> None:
+        with self.transaction() as connection:
+            rows = connection.execute(
+                "SELECT key, uid, data FROM quizzes"
+            ).fetchall()
+            connection.execute("DELETE FROM quiz_summaries")
+            connection.executemany(
+                "INSERT INTO quiz_summaries (key, uid, data) VALUES (?, ?, ?)",
+                [
+                    (key, uid, dumps(quiz_summary(loads(data))))
+                    for key, uid, data in rows
+                ],
+            )
@@ -0,0 +1,167 @@
+from asyncio import get_running_loop
+from functools import partial
+from hashlib import sha256
+from time import monotonic, time
+from typing import Any, Dict, Optional
+
+from firebase_admin import auth
+
+from ..config import settings
+from ..utils.cache import TTLCache
+from ..utils.id_token import decode_id_token, key_id
+from .signing_keys import SigningKeys
+
+
+class TokenCache:
+    """
+    Decoded claims of the verified ID tokens, keyed by the hash of the token
+    and kept until the token expires, so repeated requests with the same
+    bearer token skip the signature verification. When revocation checks
+    are enabled, the user record is checked again at the given interval.
+    With signing keys, tokens are verified against the prefetched key set
+    instead of the Firebase Admin SDK, which may fetch the keys in the
+    middle of a request. The verification always runs off the event loop.
+    :param maxsize: - the maximum number of cached tokens
+    :param check_revoked: - check if the token was revoked or the user disabled
+    :param revocation_interval: - the seconds between revocation checks
+    :param signing_keys: - the prefetched signing keys
+    :param project_id: - the Firebase project id, needed with signing keys
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        check_revoked: bool = False,
+        revocation_interval: float = 300.0,
+        signing_keys: Optional[SigningKeys] = None,
+        project_id: str = "",
+    ):
+        self.check_revoked = check_revoked
+        self.revocation_interval = revocation_interval
+        self.signing_keys = signing_keys
+        self.project_id = project_id
+        self.entries = TTLCache(maxsize=maxsize, ttl=0)
+        self.verifications = 0
+        self.revocation_checks = 0
+        self.failures = 0
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Get the decoded claims of the token, verifying it only on a miss.
+        :param token: - the ID token
+        :return: the decoded claims
+        :raises Exception: if the token is invalid, expired or revoked
+        """
+        key = sha256(token.encode("utf-8")).hexdigest()
+        entry = self.entries.get(key)
+        if entry is None:
+            claims = await self._verify(token)
+        else:
+            claims, checked_at = entry
+            if (
+                not self.check_revoked
+                or monotonic() - checked_at < self.revocation_interval
+            ):
+                return claims
+        if self.check_revoked:
+            await self._check_revoked(key, claims)
+        ttl = claims.get("exp", 0) - time()
+        if ttl > 0:
+            self.entries.set(key, (claims, monotonic()), ttl=ttl)
+        return claims
+
+    async def _verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verify the signature of the token on the default executor.
+        :param token: - the ID token
+        :return: the decoded claims
+        """
+        self.verifications += 1
+        loop = get_running_loop()
+        try:
+            if self.signing_keys is None:
+                return await loop.run_in_executor(
+                    None, auth.verify_id_token, token
+                )
+            verifiers = await self.signing_keys.get(key_id(token))
+            return await loop.run_in_executor(
+                None,
+                partial(decode_id_token, token, verifiers, self.project_id),
+            )
+        except Exception:
+            self.failures += 1
+            raise
+
+    async def _check_revoked(self, key: str, claims: Dict[str, Any]) -> None:
+        """
+        Check that the user is enabled and the token was not revoked.
+        :param key: - the hash of the token
+        :param claims: - the decoded claims
+        """
+        self.revocation_checks += 1
+        try:
+            user = await get_running_loop().run_in_executor(
+                None, auth.get_user, claims["uid"]
+            )
+            if user.disabled:
+                raise auth.UserDisabledError("The user record is disabled.")
+            if claims.get("iat", 0) * 1000 < user.tokens_valid_after_timestamp:
+                raise auth.RevokedIdTokenError(
+                    "The Firebase ID token has been revoked."
+                )
+        except Exception:
+            self.failures += 1
+            self.entries.pop(key)
+            raise
+
+    def start(self) -> None:
+        """
+        Start refreshing the signing keys in the background.
+        """
+        if self.signing_keys is not None:
+            self.signing_keys.start()
+
+    async def stop(self) -> None:
+        """
+        Stop refreshing the signing keys.
+        """
+        if self.signing_keys is not None:
+            await self.signing_keys.stop()
+
+    def clear(self) -> None:
+        """
+        Remove all tokens and reset the counters.
+        """
+        self.entries.clear()
+        self.verifications = 0
+        self.revocation_checks = 0
+        self.failures = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+        :return: the cache size, hits, misses and the number of
+            verifications, revocation checks and failures
+        """
+        return {
+            **self.entries.stats(),
+            "verifications": self.verifications,
+            "revocation_checks": self.revocation_checks,
+            "failures": self.failures,
+        }
+
+
+token_cache = TokenCache(
+    maxsize=settings.auth.token_cache_size,
+    check_revoked=settings.auth.check_revoked,
+    revocation_interval=settings.auth.revocation_interval,
+    signing_keys=(
+        SigningKeys(
+            settings.auth.certs_url,
+            refresh_margin=settings.auth.keys_refresh_margin,
+        )
+        if settings.auth.prefetch_keys
+        else None
+    ),
+    project_id=settings.auth.project_id,
+)
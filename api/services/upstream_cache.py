@@ -0,0 +1,144 @@
+import asyncio
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from ..config import settings
+from ..utils.etag import compute_etag
+from .response_cache import CachedResponse
+
+
+class UpstreamCache:
+    """
+    Serialized bodies of the rarely changing upstream resources, e.g. the
+    categories and tags of the quiz api, served with stale-while-revalidate.
+    A fresh body is sent as it is. A stale body is sent too, while a single
+    background refresh fetches the resource again. Past the stale window the
+    request waits for the refresh, shared with all concurrent requests, and
+    falls back to the expired body when the upstream is down.
+    :param ttl: - the seconds a body is fresh
+    :param stale_ttl: - the seconds a stale body is served while refreshing
+    """
+
+    def __init__(self, ttl: float = 3600.0, stale_ttl: float = 86400.0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.headers = {
+            "Cache-Control": (
+                f"public, max-age={int(ttl)}, "
+                f"stale-while-revalidate={int(stale_ttl)}, "
+                f"stale-if-error={int(stale_ttl)}"
+            )
+        }
+        self.entries: Dict[str, Tuple[CachedResponse, float]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    async def get(
+        self, key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> CachedResponse:
+        """
+        Get the cached body, fetching the resource when it is stale.
+        :param key: - the cache key
+        :param fetch: - the coroutine function fetching the JSON content
+        :return: the cached body
+        :raises Exception: if the fetch fails and nothing is cached
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            cached, fetched_at = entry
+            age = monotonic() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return cached
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self.refresh(key, fetch)
+                return cached
+        self.misses += 1
+        try:
+            return await asyncio.shield(self.refresh(key, fetch))
+        except Exception:
+            if entry is None:
+                raise
+            return entry[0]
+
+    def refresh(
+        self, key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        """
+        Fetch the resource again. Concurrent callers share a single fetch.
+        :param key: - the cache key
+        :param fetch: - the coroutine function fetching the JSON content
+        :return: the task of the fetch
+        """
+        task = self._refreshing.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._fetch(key, fetch))
+            # background refreshes are not awaited, so failures are consumed
+            task.add_done_callback(
+                lambda done: done.cancelled() or done.exception()
+            )
+            self._refreshing[key] = task
+        return task
+
+    async def _fetch(
+        self, key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> CachedResponse:
+        """
+        Fetch the resource and serialize it once.
+        :param key: - the cache key
+        :param fetch: - the coroutine function fetching the JSON content
+        :return: the cached body
+        """
+        self.refreshes += 1
+        try:
+            content = await fetch()
+        except Exception:
+            self.failures += 1
+            raise
+        body = JSONResponse(content=jsonable_encoder(content)).body
+        cached = CachedResponse(
+            body=body, etag=compute_etag(body), headers=self.headers
+        )
+        self.entries[key] = (cached, monotonic())
+        return cached
+
+    def clear(self) -> None:
+        """
+        Drop all cached bodies and reset the counters.
+        """
+        self.entries.clear()
+        self._refreshing.clear()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+        :return: the number of entries, fresh and stale hits, misses,
+            refreshes and failed refreshes
+        """
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+upstream_cache = UpstreamCache(
+    ttl=settings.cache.upstream_ttl,
+    stale_ttl=settings.cache.upstream_stale_ttl,
+)
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Least recently used cache whose entries expire after a time to live.
+    :param maxsize: - the maximum number of entries
+    :param ttl: - the time to live of an entry in seconds
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get the value stored under the key and mark it as recently used.
+        :param key: - the key
+        :param default: - the value returned when the key is missing or expired
+        :return: the value or default
+        """
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(
+        self, key: Hashable, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        """
+        Store the value under the key, evicting the least recently used entry
+        when the cache is full.
+        :param key: - the key
+        :param value: - the value
+        :param ttl: - the time to live of this entry, defaults to the cache ttl
+        """
+        self._data[key] = (
+            monotonic() + (self.ttl if ttl is None else ttl),
+            value,
+        )
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Invalidate the entry stored under the key.
+        :param key: - the key
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset the counters.
+        """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+        :return: the number of entries, hits and misses
+        """
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
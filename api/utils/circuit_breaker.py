@@ -0,0 +1,128 @@
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, Union
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when the circuit is open and the call is rejected without trying.
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over a window of the most recent calls. The circuit opens
+    when the failure rate of the window reaches the threshold, and rejects
+    calls until the open timeout has passed. Then a few probe calls are let
+    through (half-open): a success closes the circuit, a failure opens it
+    again.
+    :param window: - the number of recent calls for the failure rate
+    :param failure_rate: - the failure rate opening the circuit
+    :param min_calls: - the calls needed before the failure rate is used
+    :param open_timeout: - the seconds the circuit stays open
+    :param half_open_calls: - the concurrent probe calls when half-open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window: int = 20,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        open_timeout: float = 30.0,
+        half_open_calls: int = 1,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_timeout = open_timeout
+        self.half_open_calls = half_open_calls
+        self.state = self.CLOSED
+        self.calls: Deque[bool] = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.probes = 0
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self) -> None:
+        """
+        Check that a call may be made now.
+        :raises CircuitOpenError: if the circuit is open
+        """
+        if self.state == self.OPEN:
+            if monotonic() - self.opened_at < self.open_timeout:
+                self.rejected += 1
+                raise CircuitOpenError("Circuit is open")
+            self.state = self.HALF_OPEN
+            self.probes = 0
+        if self.state == self.HALF_OPEN:
+            if self.probes >= self.half_open_calls:
+                self.rejected += 1
+                raise CircuitOpenError("Circuit is half-open")
+            self.probes += 1
+
+    def record(self, success: bool) -> None:
+        """
+        Record the outcome of an allowed call.
+        :param success: - whether the call succeeded
+        """
+        if self.state == self.HALF_OPEN:
+            if success:
+                self.state = self.CLOSED
+                self.calls.clear()
+            else:
+                self._open()
+            return
+        self.calls.append(success)
+        failures = self.calls.count(False)
+        if (
+            self.state == self.CLOSED
+            and len(self.calls) >= self.min_calls
+            and failures >= self.failure_rate * len(self.calls)
+        ):
+            self._open()
+
+    def cancel(self) -> None:
+        """
+        Forget an allowed call that was cancelled before its outcome.
+        """
+        if self.state == self.HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def _open(self) -> None:
+        """
+        Open the circuit.
+        """
+        self.state = self.OPEN
+        self.opened_at = monotonic()
+        self.opens += 1
+        self.calls.clear()
+
+    def reset(self) -> None:
+        """
+        Close the circuit and reset the counters.
+        """
+        self.state = self.CLOSED
+        self.calls.clear()
+        self.probes = 0
+        self.opens = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, Union[str, int, float]]:
+        """
+        Get the breaker state and counters.
+        :return: the state, the failure rate of the window, the number of
+            times the circuit opened and of rejected calls
+        """
+        return {
+            "state": self.state,
+            "failure_rate": (
+                self.calls.count(False) / len(self.calls)
+                if self.calls
+                else 0.0
+            ),
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
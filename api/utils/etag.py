@@ -0,0 +1,42 @@
+from hashlib import sha256
+from json import dumps
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+
+def compute_etag(content: Any) -> str:
+    """
+    Compute a strong ETag from the content hash.
+    :param content: - the JSON serializable content
+    :return: the quoted ETag
+    """
+    if not isinstance(content, bytes):
+        content = dumps(
+            jsonable_encoder(content),
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode("utf-8")
+    return f'"{sha256(content).hexdigest()[:32]}"'
+
+
+def match_etag(header: Optional[str], etag: str, weak: bool = False) -> bool:
+    """
+    Check if the ETag is listed in the If-Match or If-None-Match header.
+    :param header: - the header value
+    :param etag: - the current ETag
+    :param weak: - use the weak comparison (If-None-Match)
+    :return: True if the header matches the ETag, False otherwise
+    """
+    if header is None:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if weak and tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
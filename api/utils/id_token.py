@@ -0,0 +1,98 @@
+from base64 import urlsafe_b64decode
+from json import loads
+from time import time
+from typing import Any, Dict, Mapping
+
+from google.auth.crypt import RSAVerifier
+
+
+class InvalidIdTokenError(ValueError):
+    """
+    Raised when the ID token is malformed, badly signed or expired.
+    """
+
+
+def _b64decode(segment: str) -> bytes:
+    """
+    Decode the base64url segment of the token, which has no padding.
+    :param segment: - the segment
+    :return: the decoded bytes
+    """
+    return urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def parse_certificates(certs: Mapping[str, str]) -> Dict[str, RSAVerifier]:
+    """
+    Parse the public certificates once, so verifying a token is only the
+    signature check.
+    :param certs: - the PEM certificates keyed by key id
+    :return: the verifiers keyed by key id
+    """
+    return {kid: RSAVerifier.from_string(pem) for kid, pem in certs.items()}
+
+
+def key_id(token: str) -> str:
+    """
+    Get the id of the key that signed the token, without verifying it.
+    :param token: - the ID token
+    :return: the key id or an empty string
+    """
+    try:
+        return loads(_b64decode(token.split(".", 1)[0])).get("kid", "")
+    except ValueError:
+        return ""
+
+
+def decode_id_token(
+    token: str,
+    verifiers: Mapping[str, RSAVerifier],
+    project_id: str,
+    clock_skew: int = 0,
+) -> Dict[str, Any]:
+    """
+    Verify the Firebase ID token with the prefetched signing keys, the same
+    way the Firebase Admin SDK does, and decode its claims.
+    :param token: - the ID token
+    :param verifiers: - the verifiers of the signing keys keyed by key id
+    :param project_id: - the Firebase project id
+    :param clock_skew: - the tolerated clock skew in seconds
+    :return: the decoded claims with the uid
+    :raises InvalidIdTokenError: if the token is not valid
+    """
+    try:
+        header_segment, payload_segment, signature_segment = token.split(".")
+        header = loads(_b64decode(header_segment))
+        claims = loads(_b64decode(payload_segment))
+        signature = _b64decode(signature_segment)
+    except ValueError:
+        raise InvalidIdTokenError("Token is malformed.")
+    if header.get("alg") != "RS256":
+        raise InvalidIdTokenError("Token has an incorrect algorithm.")
+    verifier = verifiers.get(header.get("kid", ""))
+    if verifier is None:
+        raise InvalidIdTokenError("Token has an unknown key id.")
+    if not verifier.verify(
+        f"{header_segment}.{payload_segment}".encode("ascii"), signature
+    ):
+        raise InvalidIdTokenError("Token has an invalid signature.")
+
+    now = time()
+    if claims.get("aud") != project_id:
+        raise InvalidIdTokenError("Token has an incorrect audience.")
+    if claims.get("iss") != f"https://securetoken.google.com/{project_id}":
+        raise InvalidIdTokenError("Token has an incorrect issuer.")
+    subject = claims.get("sub")
+    if not isinstance(subject, str) or not 0 < len(subject) <= 128:
+        raise InvalidIdTokenError("Token has an invalid subject.")
+    if (
+        not isinstance(claims.get("exp"), int)
+        or claims["exp"] < now - clock_skew
+    ):
+        raise InvalidIdTokenError("Token expired.")
+    if (
+        not isinstance(claims.get("iat"), int)
+        or claims["iat"] > now + clock_skew
+    ):
+        raise InvalidIdTokenError("Token used too early.")
+    claims["uid"] = subject
+    return claims
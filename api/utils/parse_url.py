@@ -1,3 +1,56 @@
+from functools import lru_cache
+from typing import Any, Tuple
+from urllib.parse import quote
+
+
+def _encode(value: Any) -> str:
+    """
+    Percent-encode the value, joining the items of a list with commas.
+    :param value: - the value
+    :return: the encoded value
+    """
+    if isinstance(value, (list, tuple)):
+        return ",".join(quote(str(item), safe="") for item in value)
+    return quote(str(value), safe="")
+
+
+@lru_cache(maxsize=1024)
+def _canonical_query(items: Tuple[Tuple[str, Any], ...]) -> str:
+    """
+    Encode the sorted options, memoized for the hot game options.
+    :param items: - the sorted options with hashable values
+    :return: the query string
+    """
+    return "&".join(
+        f"{quote(key, safe='')}={_encode(value)}" for key, value in items
+    )
+
+
+def canonical_query(options: dict) -> str:
+    """
+    Build the query string of the options, which is the same for the same
+    options whatever the order of the keys. Options set to None are left
+    out, lists are joined with commas and every key and value is
+    percent-encoded.
+    :param options: - the options
+    :return: the query string without the leading "?"
+    """
+    items = []
+    for key, value in options.items():
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = tuple(value)
+        elif isinstance(value, set):
+            value = tuple(sorted(value))
+        items.append((key, value))
+    items.sort()
+    try:
+        return _canonical_query(tuple(items))
+    except TypeError:  # unhashable value, e.g. a dict
+        return _canonical_query.__wrapped__(tuple(items))
+
+
 def parse_url(url: str, options: dict) -> str:
     """
     Parse the url and add the options to it.
@@ -5,13 +58,5 @@ def parse_url(url: str, options: dict) -> str:
     :param options: - the options to add to the url
     :return: the parsed url
     """
-    _url = url + "?"
-    for key, value in options.items():
-        if value is not None:
-            if isinstance(value, list):
-                _url += key + "=" + ",".join(value)
-            else:
-                _url += key + "=" + str(value)
-            _url += "&"
-
-    return _url[:-1]
+    query = canonical_query(options)
+    return f"{url}?{query}" if query else url
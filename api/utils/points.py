@@ -1,4 +1,4 @@
-def points_function(t: float) -> float:
+def points_function(t: float) -> int:
     """
     Return points equivalent to time spend on answer.
 
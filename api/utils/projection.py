@@ -0,0 +1,55 @@
+from time import time
+from typing import Dict, List, Sequence
+
+SUMMARY_FIELDS = (
+    "title",
+    "category",
+    "difficulty",
+    "tags",
+    "questions_count",
+    "updated_at",
+)
+
+QUIZ_FIELDS = ("uid", "questions") + SUMMARY_FIELDS
+
+
+def parse_fields(fields: str) -> List[str]:
+    """
+    Parse the comma separated list of quiz fields.
+    :param fields: - the fields, e.g. "title,category,questions_count"
+    :return: the list of fields without duplicates
+    :raises ValueError: if a field is not a quiz field
+    """
+    parsed = list(dict.fromkeys(field.strip() for field in fields.split(",")))
+    unknown = [field for field in parsed if field not in QUIZ_FIELDS]
+    if len(unknown) > 0:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}")
+    return parsed
+
+
+def project_quiz(quiz: Dict, fields: Sequence[str]) -> Dict:
+    """
+    Keep only the requested fields of the quiz.
+    :param quiz: - the quiz
+    :param fields: - the fields, questions_count is the number of questions
+    :return: the projected quiz
+    """
+    projected = {}
+    for field in fields:
+        if field == "questions_count" and field not in quiz:
+            projected[field] = len(quiz.get("questions") or [])
+        elif quiz.get(field) is not None:
+            projected[field] = quiz[field]
+    return projected
+
+
+def quiz_summary(quiz: Dict) -> Dict:
+    """
+    Build the compact summary of the quiz stored in the user quiz index.
+    :param quiz: - the quiz
+    :return: the summary with the time of the update
+    """
+    return {
+        **project_quiz(quiz, SUMMARY_FIELDS[:-1]),
+        "updated_at": int(time()),
+    }
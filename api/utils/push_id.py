@@ -0,0 +1,18 @@
+from random import choice
+from time import time
+
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+
+def push_id() -> str:
+    """
+    Generate a 20 character key like the Firebase push ids.
+    Keys generated later sort after the earlier ones.
+    :return: the key
+    """
+    now = int(time() * 1000)
+    timestamp = ""
+    for _ in range(8):
+        timestamp = PUSH_CHARS[now % 64] + timestamp
+        now //= 64
+    return timestamp + "".join(choice(PUSH_CHARS) for _ in range(12))
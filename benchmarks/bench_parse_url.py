@@ -0,0 +1,77 @@
+"""
+Compare the canonical query builder with the former string concatenation
+in ``parse_url``, for the game options sent to the quiz api.
+
+    python -m benchmarks.bench_parse_url
+"""
+
+from timeit import repeat
+
+from api.utils.parse_url import _canonical_query, parse_url
+
+URL = "https://the-trivia-api.com/api//questions"
+
+OPTIONS = {
+    "solo": {"limit": 5},
+    "categories": {
+        "categories": "arts_and_literature",
+        "difficulty": "medium",
+        "limit": 10,
+    },
+    "tags": {
+        "categories": ["music", "film_and_tv", "history"],
+        "difficulty": "hard",
+        "limit": 20,
+        "tags": ["young_adult", "wine", "acting", "1910's"],
+        "uid": None,
+        "quiz_id": None,
+    },
+}
+
+
+def legacy_parse_url(url: str, options: dict) -> str:
+    """The former parse_url"""
+    _url = url + "?"
+    for key, value in options.items():
+        if value is not None:
+            if isinstance(value, list):
+                _url += key + "=" + ",".join(value)
+            else:
+                _url += key + "=" + str(value)
+            _url += "&"
+
+    return _url[:-1]
+
+
+def uncached_parse_url(url: str, options: dict) -> str:
+    """The canonical query builder without the memoization"""
+    items = tuple(
+        sorted(
+            (k, tuple(v) if isinstance(v, list) else v)
+            for k, v in options.items()
+            if v is not None
+        )
+    )
+    return f"{url}?{_canonical_query.__wrapped__(items)}"
+
+
+def measure(func, options: dict, number: int = 20000) -> float:
+    best = min(repeat(lambda: func(URL, options), number=number, repeat=5))
+    return best / number * 1e6
+
+
+def main():
+    print(
+        f"{'options':>12} {'legacy us':>10} {'uncached us':>12} "
+        f"{'canonical us':>13}"
+    )
+    for name, options in OPTIONS.items():
+        print(
+            f"{name:>12} {measure(legacy_parse_url, options):>10.2f} "
+            f"{measure(uncached_parse_url, options):>12.2f} "
+            f"{measure(parse_url, options):>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
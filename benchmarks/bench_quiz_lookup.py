@@ -0,0 +1,115 @@
+"""
+Compare the cost of reading one user quiz by scanning all of the user's
+quizzes with the direct ``Quizzes/<quiz_id>`` lookup.
+
+The Realtime Database is replaced with an in-memory tree that serializes
+every response to JSON, so the payload size is what Firebase would send.
+
+    python -m benchmarks.bench_quiz_lookup
+"""
+
+import asyncio
+import json
+from time import perf_counter
+from unittest import mock
+
+from api.services.repository import FirebaseRepository, Repository
+
+UID = "X" * 28
+
+
+class FakeReference:
+    def __init__(self, tree: dict, path: str, stats: dict):
+        self.tree = tree
+        self.path = path
+        self.stats = stats
+        self.child_name = None
+        self.value = None
+
+    def child(self, path: str):
+        return FakeReference(self.tree, f"{self.path}/{path}", self.stats)
+
+    def order_by_child(self, child_name: str):
+        self.child_name = child_name
+        return self
+
+    def equal_to(self, value: str):
+        self.value = value
+        return self
+
+    def get(self):
+        node = self.tree
+        for key in self.path.split("/"):
+            node = node.get(key) if node is not None else None
+        if self.child_name is not None:
+            node = {
+                k: v
+                for k, v in node.items()
+                if v.get(self.child_name) == self.value
+            }
+        payload = json.dumps(node)
+        self.stats["bytes"] = len(payload)
+        return json.loads(payload)
+
+
+def make_tree(size: int) -> dict:
+    question = {
+        "question": "Where and when was Alan Turing born?",
+        "correct_answer": "in London in 1912",
+        "incorrect_answers": ["in Manchester", "in Oxford", "in Cambridge"],
+    }
+    quizzes = {
+        f"{i:020d}": {
+            "uid": UID,
+            "title": f"Quiz {i}",
+            "category": "History",
+            "difficulty": "easy",
+            "tags": "1910's",
+            "questions": [question] * 10,
+        }
+        for i in range(size)
+    }
+    return {"Quizzes": quizzes}
+
+
+async def scan(repository: Repository, quiz_id: str) -> bool:
+    return quiz_id in await repository.get_user_quizzes(UID)
+
+
+async def direct(repository: Repository, quiz_id: str) -> bool:
+    quiz = await repository.get_quiz(quiz_id)
+    return quiz is not None and quiz["uid"] == UID
+
+
+async def measure(lookup, tree: dict, rounds: int = 20):
+    stats = {"bytes": 0}
+    repository = FirebaseRepository(max_workers=1)
+    with mock.patch(
+        "firebase_admin.db.reference",
+        lambda path: FakeReference(tree, path, stats),
+    ):
+        start = perf_counter()
+        for _ in range(rounds):
+            assert await lookup(repository, f"{0:020d}")
+        elapsed = (perf_counter() - start) / rounds
+    repository.shutdown()
+    return elapsed * 1000, stats["bytes"]
+
+
+async def main():
+    print(
+        f"{'quizzes':>8} {'scan ms':>10} {'scan bytes':>12} "
+        f"{'direct ms':>10} {'direct bytes':>12}"
+    )
+    for size in (10, 100, 1000, 10000):
+        tree = make_tree(size)
+        scan_ms, scan_bytes = await measure(scan, tree)
+        direct_ms, direct_bytes = await measure(direct, tree)
+        print(
+            f"{size:>8} {scan_ms:>10.2f} {scan_bytes:>12} "
+            f"{direct_ms:>10.2f} {direct_bytes:>12}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Compare the memory of 10k running games kept as the former ad-hoc dicts
+with the ``Room`` objects, and the time of the ready, answer and leave steps
+of a player.
+
+    python -m benchmarks.bench_rooms
+"""
+
+import tracemalloc
+from asyncio import Event
+from time import perf_counter
+
+from api.services.game_room import Room, compile_question
+
+ROOMS = 10_000
+PLAYERS = 4
+QUESTIONS = tuple(
+    compile_question(f"question {number}", "A", ["B", "C", "D"])
+    for number in range(10)
+)
+OPTIONS = {
+    "nickname": "me1",
+    "max_players": PLAYERS,
+    "categories": "music",
+    "limit": len(QUESTIONS),
+    "difficulty": "medium",
+    "tags": None,
+    "uid": None,
+    "quiz_id": None,
+}
+
+
+def legacy_room(room: str) -> dict:
+    """A running game in the former shape"""
+    sids = [f"{room}-{number}" for number in range(PLAYERS)]
+    return {
+        "current_players": list(sids),
+        "points": {sid: 0 for sid in sids},
+        "current_question": 0,
+        "nicknames": {sid: f"me{number}" for number, sid in enumerate(sids)},
+        "answered": {sid: [False] * len(QUESTIONS) for sid in sids},
+        "uids": {},
+        "game_options": dict(OPTIONS),
+        "filled": Event(),
+        "question_time": 12,
+        "answer_time": 3,
+        "questions": [
+            {
+                "question": question.question,
+                "correct_answer": question.answers[0],
+                "answers": list(question.answers),
+            }
+            for question in QUESTIONS
+        ],
+    }
+
+
+def compact_room(room: str) -> Room:
+    """A running game as a Room object"""
+    connection = Room(max_players=PLAYERS)
+    connection.questions = QUESTIONS
+    for number in range(PLAYERS):
+        connection.seat(f"{room}-{number}", f"me{number}")
+    for number in range(PLAYERS):
+        connection.set_ready(f"{room}-{number}")
+    connection.ask(0)
+    return connection
+
+
+def measure(factory) -> int:
+    """Bytes allocated for ROOMS rooms"""
+    names = [str(number) for number in range(ROOMS)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rooms = {room: factory(room) for room in names}
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del rooms
+    return used
+
+
+def legacy_steps(connection: dict, sid: str) -> None:
+    """Ready, answer and leave in the former shape"""
+    if sid not in connection["current_players"]:
+        connection["current_players"].append(sid)
+    if not connection["answered"][sid][0]:
+        connection["answered"][sid][0] = True
+    connection["current_players"].remove(sid)
+
+
+def compact_steps(connection: Room, sid: str) -> None:
+    """Ready, answer and leave with a Room object"""
+    connection.set_ready(sid)
+    connection.answer(sid, 0)
+    connection.leave(sid)
+
+
+def time_steps(factory, steps) -> float:
+    """Seconds of the steps of the last seated player of every room"""
+    rooms = [(factory(str(n)), f"{n}-{PLAYERS - 1}") for n in range(ROOMS)]
+    for connection, sid in rooms:  # free the seat the steps take again
+        if isinstance(connection, Room):
+            connection.leave(sid)
+        else:
+            connection["current_players"].remove(sid)
+    start = perf_counter()
+    for connection, sid in rooms:
+        steps(connection, sid)
+    return perf_counter() - start
+
+
+def main():
+    legacy = measure(legacy_room)
+    compact = measure(compact_room)
+    print(f"{ROOMS} running games of {PLAYERS} players")
+    print(f"  dicts  {legacy / 2**20:8.2f} MiB  {legacy / ROOMS:6.0f} B/room")
+    print(
+        f"  Room   {compact / 2**20:8.2f} MiB  {compact / ROOMS:6.0f} B/room"
+    )
+    for name, factory, steps in (
+        ("dicts", legacy_room, legacy_steps),
+        ("Room", compact_room, compact_steps),
+    ):
+        best = min(time_steps(factory, steps) for _ in range(5)) / ROOMS
+        print(f"  {name:6} {best * 1e9:8.0f} ns per ready, answer and leave")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,11 @@ import pytest
 import asyncio
 import uvicorn
 import socketio
+import httpx
 import requests
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from typer.testing import CliRunner
-from requests_mock.mocker import Mocker
 from typing import List, Optional
 
 # This next line ensures tests uses its own settings environment
@@ -16,6 +16,13 @@ os.environ["FORCE_ENV_FOR_DYNACONF"] = "testing"  # noqa
 
 from api import sio, app, settings  # noqa
 from api.cli import cli  # noqa
+from api.services.http_client import http_client
+from api.services.question_pool import question_pool
+from api.services.quiz_api import quiz_api
+from api.services.repository import repository
+from api.services.response_cache import response_cache
+from api.services.token_cache import token_cache
+from api.services.upstream_cache import upstream_cache
 from api.utils.points import points_function
 from api.utils.parse_url import parse_url
 from api.utils.timestamp import get_timestamp
@@ -35,6 +42,18 @@ def go_to_tmpdir(request):
         yield
 
 
+# each test starts with empty in-memory caches
+@pytest.fixture(autouse=True)
+def clear_caches():
+    repository.users.clear()
+    response_cache.clear()
+    token_cache.clear()
+    upstream_cache.clear()
+    question_pool.clear()
+    quiz_api.reset()
+    yield
+
+
 @pytest.fixture(scope="function", name="app")
 def _app():
     return app
@@ -81,19 +100,32 @@ def _get_timestamp():
 
 
 class MockRequests:
-    """Mock http requests"""
+    """Mock http requests of the shared http client"""
 
-    def __init__(self, requests_mock: Mocker) -> None:
-        self.req = requests_mock
-        self.req.real_http = True
+    def __init__(self, mocker) -> None:
+        self.responses = {}
+        mocker.patch.object(
+            http_client, "transport", httpx.MockTransport(self.handle)
+        )
+        mocker.patch.object(http_client, "_client", None)
 
     def get(self, url: str, json: dict, status_code: int):
-        self.req.get(url, json=json, status_code=status_code)
+        self.responses[("GET", str(httpx.URL(url).copy_with(query=None)))] = (
+            json,
+            status_code,
+        )
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        key = (request.method, str(request.url.copy_with(query=None)))
+        if key not in self.responses:
+            raise httpx.ConnectError("Not mocked", request=request)
+        json, status_code = self.responses[key]
+        return httpx.Response(status_code, json=json)
 
 
 @pytest.fixture(scope="function")
-def mock_request(requests_mock: Mocker):
-    return MockRequests(requests_mock)
+def mock_request(mocker):
+    return MockRequests(mocker)
 
 
 class UvicornTestServer(uvicorn.Server):
@@ -0,0 +1,137 @@
+import pytest
+
+from api.services.game_room import (
+    GameQuestion,
+    Room,
+    RoomStateError,
+    compile_question,
+)
+
+QUESTIONS = (
+    compile_question("question 1", "A", ["B", "C", "D"]),
+    compile_question("question 2", "B", ["A", "C", "D"]),
+)
+
+
+def test_compile_question():
+    question = compile_question("question 1", "A", ["B", "C", "D"])
+    assert question == GameQuestion("question 1", ("A", "B", "C", "D"), 0)
+    assert question.answers[question.correct] == "A"
+
+
+def test_room_ready():
+    room = Room(max_players=2)
+    room.questions = QUESTIONS
+    room.seat("sid1", "me1", "uid1")
+    assert not room.is_full
+    room.seat("sid2", "me2")
+    assert room.is_full
+
+    assert not room.set_ready("sid3")
+    assert room.set_ready("sid1")
+    assert not room.set_ready("sid1")
+    assert not room.filled.is_set()
+    assert room.set_ready("sid2")
+    assert room.filled.is_set()
+    assert room.current_players == {"sid1", "sid2"}
+    assert room.players["sid1"].answered == bytearray(2)
+
+
+def test_room_solo_has_no_event():
+    room = Room()
+    room.questions = QUESTIONS
+    room.seat("sid1", "me1")
+    assert room.set_ready("sid1")
+    assert room.filled is None
+
+
+def test_room_without_questions():
+    room = Room(max_players=2)
+    room.seat("sid1", "me1")
+    room.seat("sid2", "me2")
+    assert not room.set_ready("sid1")
+    assert room.current_players == set()
+    with pytest.raises(RoomStateError):
+        room.ask(0)
+    assert room.phase == Room.LOBBY
+
+    room.load(QUESTIONS)
+    assert room.current_players == {"sid1"}
+    assert room.players["sid1"].answered == bytearray(2)
+    assert room.set_ready("sid2")
+    assert room.filled.is_set()
+
+
+def test_room_phases():
+    room = Room()
+    room.questions = QUESTIONS
+    room.seat("sid1", "me1")
+    room.set_ready("sid1")
+    assert room.phase == Room.LOBBY
+
+    with pytest.raises(RoomStateError):
+        room.move(Room.ANSWER)
+    assert sorted(room.ask(0)) == ["A", "B", "C", "D"]
+    assert room.phase == Room.QUESTION
+    with pytest.raises(RoomStateError):
+        room.ask(1)
+    room.move(Room.ANSWER)
+    room.ask(1)
+    room.move(Room.ANSWER)
+    room.move(Room.RESULTS)
+    with pytest.raises(RoomStateError):
+        room.move(Room.QUESTION)
+
+
+def test_room_answer():
+    room = Room(max_players=2)
+    room.questions = QUESTIONS
+    room.seat("sid1", "me1")
+    room.seat("sid2", "me2")
+    room.set_ready("sid1")
+    assert room.answer("sid1", 0) is None  # the lobby takes no answers
+
+    answers = room.ask(0)
+    assert answers[room.correct_answer] == "A"
+    assert room.answer("sid1", answers.index("A")) is True
+    assert room.answer("sid1", answers.index("A")) is None
+    assert room.answer("sid2", answers.index("A")) is None  # not ready
+    room.move(Room.ANSWER)
+    answers = room.ask(1)
+    assert answers[room.correct_answer] == "B"
+    assert room.players["sid1"].answered == bytearray(b"\x01\x00")
+    assert room.answer("sid1", answers.index("A")) is False
+    room.move(Room.ANSWER)
+    assert room.answer("sid1", answers.index("B")) is None
+
+
+def test_room_results():
+    room = Room(max_players=3)
+    room.questions = QUESTIONS
+    for number in range(1, 4):
+        room.seat(f"sid{number}", f"me{number}")
+    room.set_ready("sid1")
+    room.set_ready("sid2")
+    room.ask(0)
+    room.players["sid1"].points = 500
+
+    room.leave("sid1")
+    room.leave("sid1")
+
+    assert room.current_players == {"sid2"}
+    assert room.points() == {"sid1": 500, "sid2": 0}
+    assert room.results() == {"me1": 500, "me2": 0, "me3": 0}
+
+
+def test_room_leave_lobby():
+    room = Room(max_players=2)
+    room.questions = QUESTIONS
+    room.seat("sid1", "me1")
+    room.seat("sid2", "me2")
+    room.set_ready("sid2")
+    assert room.is_full
+
+    room.leave("sid2")
+    assert not room.is_full
+    assert room.current_players == set()
+    assert room.results() == {"me1": 0}
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from api.services.game_scheduler import GameScheduler
+
+
+@pytest.mark.asyncio
+async def test_scheduler_order():
+    scheduler = GameScheduler()
+    calls = []
+
+    async def callback(name):
+        calls.append(name)
+
+    scheduler.call_later(0.03, callback, "c")
+    scheduler.call_later(0.01, callback, "a")
+    scheduler.call_later(0.02, callback, "b")
+    assert len(scheduler) == 3
+
+    await asyncio.sleep(0.06)
+
+    assert calls == ["a", "b", "c"]
+    assert scheduler.stats() == {"timers": 0, "running": 0, "fired": 3}
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_earlier_timer_wakes_up():
+    scheduler = GameScheduler()
+    calls = []
+
+    async def callback(name):
+        calls.append(name)
+
+    scheduler.call_later(10, callback, "late")
+    await asyncio.sleep(0.01)
+    scheduler.call_later(0.01, callback, "early")
+    await asyncio.sleep(0.03)
+
+    assert calls == ["early"]
+    assert len(scheduler) == 1
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_chained_timers():
+    scheduler = GameScheduler()
+    calls = []
+
+    async def callback(index):
+        calls.append(index)
+        if index < 3:
+            scheduler.call_later(0.01, callback, index + 1)
+
+    scheduler.call_later(0, callback, 0)
+    await asyncio.sleep(0.1)
+
+    assert calls == [0, 1, 2, 3]
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cancel():
+    scheduler = GameScheduler()
+    calls = []
+
+    async def callback(name):
+        calls.append(name)
+
+    timer = scheduler.call_later(0.01, callback, "cancelled")
+    scheduler.call_later(0.01, callback, "called")
+    timer.cancel()
+    await asyncio.sleep(0.03)
+
+    assert calls == ["called"]
+    assert scheduler.fired == 1
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_failed_callback():
+    scheduler = GameScheduler()
+    calls = []
+    errors = []
+    asyncio.get_running_loop().set_exception_handler(
+        lambda loop, context: errors.append(context["exception"])
+    )
+
+    async def fail():
+        raise ValueError("Error")
+
+    async def callback():
+        calls.append(True)
+
+    scheduler.call_later(0, fail)
+    scheduler.call_later(0.01, callback)
+    await asyncio.sleep(0.03)
+
+    assert calls == [True]
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_stop():
+    scheduler = GameScheduler()
+    started = asyncio.Event()
+    calls = []
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def callback():
+        calls.append(True)
+
+    scheduler.call_later(0, slow)
+    scheduler.call_later(0.05, callback)
+    await started.wait()
+    assert scheduler.stats()["running"] == 1
+
+    await scheduler.stop()
+    await asyncio.sleep(0.07)
+
+    assert calls == []
+    assert scheduler.stats() == {"timers": 0, "running": 0, "fired": 1}
@@ -0,0 +1,47 @@
+import httpx
+import pytest
+
+from api.services.http_client import HTTPClient
+
+
+def test_client_settings():
+    """Pool limits and timeouts should be applied to the client"""
+    client = HTTPClient(
+        max_connections=10,
+        max_keepalive_connections=5,
+        connect_timeout=1.0,
+        timeout=2.0,
+        http2=False,
+    )
+    assert client.limits.max_connections == 10
+    assert client.limits.max_keepalive_connections == 5
+    assert client.timeout.connect == 1.0
+    assert client.timeout.read == 2.0
+    assert client.timeout.pool == 2.0
+
+
+@pytest.mark.asyncio
+async def test_client_shared():
+    """Requests should share one client until it is stopped"""
+    requests = []
+
+    def handle(request):
+        requests.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    client = HTTPClient()
+    client.transport = httpx.MockTransport(handle)
+    client.start()
+    shared = client.client
+
+    response = await client.get("https://example.com/a")
+    await client.get("https://example.com/b", params={"x": 1})
+    assert response.json() == {"ok": True}
+    assert client.client is shared
+    assert str(requests[1].url) == "https://example.com/b?x=1"
+
+    await client.stop()
+    assert shared.is_closed
+    await client.get("https://example.com/c")
+    assert client.client is not shared
+    await client.stop()
@@ -0,0 +1,120 @@
+import asyncio
+
+import httpx
+import pytest
+
+from api.services.http_client import http_client
+from api.services.question_pool import QuestionPool, pool_key
+
+
+@pytest.fixture
+def quiz_api(mocker):
+    """Stand-in for the quiz api counting the question requests"""
+    state = {"requests": [], "status_code": 200}
+
+    def handle(request):
+        state["requests"].append(request)
+        number = len(state["requests"])
+        return httpx.Response(
+            state["status_code"],
+            json=[
+                {
+                    "question": f"Question {number}",
+                    "correctAnswer": "a",
+                    "incorrectAnswers": ["b", "c", "d"],
+                }
+            ],
+        )
+
+    mocker.patch.object(http_client, "transport", httpx.MockTransport(handle))
+    mocker.patch.object(http_client, "_client", None)
+    return state
+
+
+def test_pool_key():
+    """Equivalent game options should share the pool"""
+    assert pool_key(
+        {
+            "nickname": "me1",
+            "uid": None,
+            "categories": "music,history",
+            "tags": ["wine", "acting"],
+            "limit": 5,
+            "difficulty": None,
+        }
+    ) == pool_key(
+        {
+            "nickname": "me2",
+            "categories": ["history", "music"],
+            "tags": "acting,wine",
+            "limit": 5,
+        }
+    )
+    assert pool_key({"limit": 5}) != pool_key({"limit": 10})
+
+
+@pytest.mark.asyncio
+async def test_pool_refill(quiz_api):
+    """Games should pop ready batches, fetched in the background"""
+    pool = QuestionPool(depth=2, max_keys=8)
+
+    first = await pool.get({"categories": "music", "limit": 1})
+    assert first[0].question == "Question 1"
+    assert first[0].answers == ("a", "b", "c", "d")
+    assert first[0].correct == 0
+    await asyncio.sleep(0.05)
+    assert pool.stats()["batches"] == 2
+    assert "categories=music&limit=1" in str(quiz_api["requests"][0].url)
+
+    second = await pool.get({"limit": 1, "categories": ["music"]})
+    assert second[0].question == "Question 2"
+    assert pool.stats()["hits"] == 1
+    await asyncio.sleep(0.05)
+    assert len(quiz_api["requests"]) == 4
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_coalesced(quiz_api):
+    """Concurrent misses should share one request and its questions"""
+    pool = QuestionPool(depth=0, max_keys=8)
+
+    batches = await asyncio.gather(
+        *(pool.get({"categories": "music", "limit": 1}) for _ in range(5))
+    )
+    assert len(quiz_api["requests"]) == 1
+    assert pool.stats()["coalesced"] == 4
+    assert all(b is batches[0] for b in batches)
+    assert batches[0][0].question == "Question 1"
+
+    await pool.get({"categories": "music", "limit": 1})
+    assert len(quiz_api["requests"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_lru(quiz_api):
+    """The least recently used options should be dropped"""
+    pool = QuestionPool(depth=1, max_keys=2)
+
+    for limit in (1, 2, 3):
+        await pool.get({"limit": limit})
+    await asyncio.sleep(0.05)
+    assert list(pool.batches) == [(("limit", "2"),), (("limit", "3"),)]
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_upstream_error(quiz_api):
+    """Misses should fail and refills should stop when the api is down"""
+    pool = QuestionPool(depth=2, max_keys=8)
+    await pool.get({"limit": 1})
+    await asyncio.sleep(0.05)
+
+    quiz_api["status_code"] = 500
+    assert await pool.get({"limit": 1})
+    assert await pool.get({"limit": 1})
+    await asyncio.sleep(0.05)
+    assert pool.stats()["failures"] == 1
+    with pytest.raises(httpx.HTTPStatusError):
+        await pool.get({"limit": 1})
+    await pool.stop()
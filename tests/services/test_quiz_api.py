@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+import pytest
+
+from api.services.http_client import http_client
+from api.services.quiz_api import QuizApi, QuizApiUnavailableError
+from api.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def upstream(mocker):
+    """Stand-in for the quiz api with a scripted latency and status"""
+    state = {"requests": 0, "delays": [], "status_code": 200}
+
+    async def handle(request):
+        state["requests"] += 1
+        delays = state["delays"]
+        await asyncio.sleep(delays.pop(0) if delays else 0)
+        return httpx.Response(state["status_code"], json=["tag"])
+
+    mocker.patch.object(http_client, "transport", httpx.MockTransport(handle))
+    mocker.patch.object(http_client, "_client", None)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_breaker_fails_fast(upstream):
+    """Calls should be rejected once the upstream keeps failing"""
+    api = QuizApi(
+        "https://quiz.api",
+        breaker=CircuitBreaker(window=4, min_calls=4, open_timeout=60),
+    )
+    upstream["status_code"] = 503
+    for _ in range(4):
+        response = await api.get("/tags")
+        assert response.status_code == 503
+    with pytest.raises(QuizApiUnavailableError):
+        await api.get("/tags")
+    assert upstream["requests"] == 4
+    assert api.stats()["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_hedged_request(upstream):
+    """Slow requests should be hedged and the first response wins"""
+    api = QuizApi(
+        "https://quiz.api", hedge_min_samples=3, hedge_min_delay=0.01
+    )
+    for _ in range(3):
+        await api.get("/tags")
+    assert api.stats()["hedge_delay"] == 0.01
+
+    upstream["delays"] = [1.0, 0.0]
+    response = await asyncio.wait_for(api.get("/tags"), timeout=0.5)
+    assert response.json() == ["tag"]
+    assert upstream["requests"] == 5
+    assert api.stats()["hedges"] == 1
+    assert api.stats()["hedge_wins"] == 1
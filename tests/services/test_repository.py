@@ -0,0 +1,258 @@
+import time
+import asyncio
+import pytest
+from collections import OrderedDict
+from firebase_admin.exceptions import FirebaseError
+
+from api.services.repository import (
+    FirebaseRepository,
+    NicknameTakenError,
+    Repository,
+    RepositoryError,
+)
+from api.utils.etag import compute_etag
+
+
+class SlowMockDB:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def order_by_child(self, arg):
+        return self
+
+    def equal_to(self, arg):
+        return self
+
+    def limit_to_first(self, arg):
+        return self
+
+    def get(self):
+        time.sleep(self.delay)
+        return OrderedDict(
+            [("KKKKKKKKKKKKKKKKKKKK", {"uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX"})]
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_user(mocker):
+    """Repository should return the key and details of the user"""
+    mocker.patch("firebase_admin.db.reference", return_value=SlowMockDB())
+    repository = FirebaseRepository(max_workers=1)
+
+    assert await repository.get_user("XXXXXXXXXXXXXXXXXXXXXXXXXXXX") == (
+        "KKKKKKKKKKKKKKKKKKKK",
+        {"uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX"},
+    )
+    repository.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_slow_database_does_not_block_loop(mocker):
+    """Event loop should keep running while the database call is blocked"""
+    mocker.patch("firebase_admin.db.reference", return_value=SlowMockDB(0.5))
+    repository = FirebaseRepository(max_workers=1)
+
+    task = asyncio.create_task(
+        repository.get_user("XXXXXXXXXXXXXXXXXXXXXXXXXXXX")
+    )
+    start = time.perf_counter()
+    await asyncio.sleep(0.01)
+    assert time.perf_counter() - start < 0.25
+    assert await task is not None
+    repository.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_firebase_error(mocker):
+    """Firebase errors should be raised as repository errors"""
+
+    class MockDB:
+        def order_by_child(self, arg):
+            raise FirebaseError(code=503, message="error")
+
+    mocker.patch("firebase_admin.db.reference", return_value=MockDB())
+    repository = FirebaseRepository(max_workers=1)
+
+    with pytest.raises(RepositoryError):
+        await repository.get_user_quizzes("XXXXXXXXXXXXXXXXXXXXXXXXXXXX")
+    repository.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_get_user_cached(mocker):
+    """Repeated user lookups should be served from the cache"""
+    reference = mocker.patch(
+        "firebase_admin.db.reference", return_value=SlowMockDB()
+    )
+    repository = FirebaseRepository(max_workers=1)
+
+    for _ in range(3):
+        await repository.get_user("XXXXXXXXXXXXXXXXXXXXXXXXXXXX")
+    assert reference.call_count == 1
+    assert repository.users.stats() == {"size": 1, "hits": 2, "misses": 1}
+    repository.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pin_user(mocker):
+    """Connected users should stay cached past the ttl"""
+    reference = mocker.patch(
+        "firebase_admin.db.reference", return_value=SlowMockDB()
+    )
+    repository = FirebaseRepository(max_workers=1, users_cache_ttl=0)
+    uid = "XXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+
+    await repository.pin_user(uid)
+    await repository.pin_user(uid)
+    await repository.get_user(uid)
+    assert reference.call_count == 1
+
+    repository.unpin_user(uid)
+    await repository.get_user(uid)
+    assert reference.call_count == 1
+    repository.unpin_user(uid)
+    await repository.get_user(uid)
+    assert reference.call_count == 2
+    repository.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates_cache(mocker):
+    """Writing the user should drop the cached record"""
+
+    class MockDB(SlowMockDB):
+        def child(self, arg):
+            return self
+
+        def set(self, arg):
+            pass
+
+    reference = mocker.patch(
+        "firebase_admin.db.reference", return_value=MockDB()
+    )
+    repository = FirebaseRepository(max_workers=1)
+
+    await repository.get_user("XXXXXXXXXXXXXXXXXXXXXXXXXXXX")
+    await repository.update_user(
+        "KKKKKKKKKKKKKKKKKKKK", {"uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX"}
+    )
+    await repository.get_user("XXXXXXXXXXXXXXXXXXXXXXXXXXXX")
+    assert reference.call_count == 3
+    repository.shutdown()
+
+
+class NicknamesMockDB:
+    def __init__(self):
+        self.nicknames = {}
+        self.users = {}
+        self.path = []
+
+    def reference(self, path):
+        self.path = [path]
+        return self
+
+    def child(self, arg):
+        self.path.append(arg)
+        return self
+
+    def transaction(self, transaction_update):
+        nickname = self.path[1]
+        self.nicknames[nickname] = transaction_update(
+            self.nicknames.get(nickname)
+        )
+
+    def set(self, arg):
+        self.users[self.path[1]] = arg
+
+
+@pytest.mark.asyncio
+async def test_create_user_reserves_nickname(mocker):
+    """Nickname should be reserved in the index before the user is stored"""
+    mock_db = NicknamesMockDB()
+    mocker.patch("firebase_admin.db.reference", new=mock_db.reference)
+    repository = FirebaseRepository(max_workers=1)
+
+    await repository.create_user(
+        {"uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX", "nickname": "alan.turing"}
+    )
+    assert mock_db.nicknames == {
+        "alan%2Eturing": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    }
+    assert len(mock_db.users) == 1
+
+    with pytest.raises(NicknameTakenError):
+        await repository.create_user(
+            {"uid": "YYYYYYYYYYYYYYYYYYYYYYYYYYYY", "nickname": "alan.turing"}
+        )
+    assert len(mock_db.users) == 1
+    repository.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_reindex(mocker):
+    """Reindex should rebuild the indexes from the users and quizzes"""
+
+    class MockDB:
+        def __init__(self):
+            self.path = None
+            self.updates = []
+
+        def reference(self, path=None):
+            self.path = path
+            return self
+
+        def get(self):
+            if self.path == "Users":
+                return {
+                    "KKKKKKKKKKKKKKKKKKKK": {
+                        "uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+                        "nickname": "turingComplete",
+                    }
+                }
+            return {
+                "YYYYYYYYYYYYYYYYYYYY": {
+                    "uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+                    "title": "The father of the computer",
+                    "questions": [{}, {}],
+                }
+            }
+
+        def update(self, arg):
+            self.updates.append(arg)
+
+    mock_db = MockDB()
+    mocker.patch("firebase_admin.db.reference", new=mock_db.reference)
+    mocker.patch("api.utils.projection.time", return_value=1672531200)
+    repository = FirebaseRepository(max_workers=1)
+
+    await repository.reindex()
+    assert mock_db.updates == [
+        {
+            "Nicknames/turingComplete": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+            "UserQuizIndex/XXXXXXXXXXXXXXXXXXXXXXXXXXXX/YYYYYYYYYYYYYYYYYYYY": {  # noqa
+                "title": "The father of the computer",
+                "questions_count": 2,
+                "updated_at": 1672531200,
+            },
+            "QuizVersions/YYYYYYYYYYYYYYYYYYYY": compute_etag(
+                {
+                    "uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+                    "title": "The father of the computer",
+                    "questions": [{}, {}],
+                }
+            ),
+        }
+    ]
+    repository.shutdown()
+
+
+def test_incomplete_backend():
+    """A backend missing an operation should fail when it is created"""
+
+    class IncompleteRepository(FirebaseRepository):
+        _get_quiz = Repository._get_quiz
+
+    with pytest.raises(TypeError):
+        IncompleteRepository()
+    with pytest.raises(TypeError):
+        Repository()
@@ -0,0 +1,23 @@
+from api.services.response_cache import ResponseCache
+
+
+def test_response_cache():
+    """Cached body should be served with its ETag or as 304"""
+    cache = ResponseCache(maxsize=2, ttl=60)
+    assert cache.get("users/XXXX") is None
+
+    cached = cache.set("users/XXXX", {"nickname": "turingComplete"})
+    assert cached.body == b'{"nickname":"turingComplete"}'
+    assert cache.get("users/XXXX") == cached
+
+    response = cached.response()
+    assert response.status_code == 200
+    assert response.body == cached.body
+    assert response.headers["ETag"] == cached.etag
+
+    response = cached.response(f"W/{cached.etag}")
+    assert response.status_code == 304
+    assert response.body == b""
+
+    cache.invalidate("users/XXXX")
+    assert cache.get("users/XXXX") is None
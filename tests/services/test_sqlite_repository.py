@@ -0,0 +1,149 @@
+import pytest
+
+from api.services.repository import (
+    NicknameTakenError,
+    QuizModifiedError,
+    RepositoryError,
+)
+from api.services.sqlite_repository import SQLiteRepository
+from api.utils.etag import compute_etag
+
+USER = {
+    "uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+    "name": "Alan Turing",
+    "nickname": "turingComplete",
+    "picture": "",
+    "win": 0,
+    "lose": 0,
+    "favourite_category": "-",
+    "max_points": 0,
+}
+
+QUIZ = {
+    "uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+    "title": "The father of the computer",
+    "category": "History",
+    "difficulty": "easy",
+    "tags": None,
+    "questions": [
+        {
+            "question": "Where and when was Alan Turing born?",
+            "correct_answer": "in London in 1912",
+            "incorrect_answers": ["in Manchester in 1901"],
+        }
+    ],
+}
+
+
+@pytest.fixture
+def repository(tmpdir):
+    repository = SQLiteRepository(path=str(tmpdir / "test.db"), max_workers=2)
+    yield repository
+    repository.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_users(repository):
+    """Repository should store, find and update users"""
+    assert await repository.get_user(USER["uid"]) is None
+    await repository.create_user(USER)
+
+    key, user = await repository.get_user(USER["uid"])
+    assert len(key) == 20
+    assert user == USER
+
+    await repository.update_user(key, {**USER, "win": 1})
+    assert (await repository.get_user(USER["uid"]))[1]["win"] == 1
+
+
+@pytest.mark.asyncio
+async def test_users_unique_nickname(repository):
+    """Repository should not store two users with the same nickname"""
+    await repository.create_user(USER)
+    with pytest.raises(NicknameTakenError):
+        await repository.create_user(
+            {**USER, "uid": "ZZZZZZZZZZZZZZZZZZZZZZZZZZZZ"}
+        )
+    with pytest.raises(RepositoryError):
+        await repository.create_user({**USER, "nickname": "turing"})
+
+
+@pytest.mark.asyncio
+async def test_quizzes(repository):
+    """Repository should store, update and delete quizzes"""
+    for _ in range(3):
+        await repository.create_quiz(QUIZ)
+    await repository.create_quiz(
+        {**QUIZ, "uid": "ZZZZZZZZZZZZZZZZZZZZZZZZZZZZ"}
+    )
+
+    quizzes = await repository.get_user_quizzes(QUIZ["uid"])
+    assert len(quizzes) == 3
+    assert list(quizzes) == sorted(quizzes)
+    first, second, third = quizzes
+    assert list(
+        await repository.get_user_quizzes(QUIZ["uid"], limit=1, cursor=first)
+    ) == [second]
+
+    assert await repository.get_quiz(first) == {
+        k: v for k, v in QUIZ.items() if v is not None
+    }
+    changes = {"title": "Turing", "tags": "1910's"}
+    await repository.update_quiz(first, changes, {**QUIZ, **changes})
+    quiz = await repository.get_quiz(first)
+    assert quiz["title"] == "Turing"
+    assert quiz["tags"] == "1910's"
+    assert quiz["questions"] == QUIZ["questions"]
+
+    await repository.delete_quizzes(QUIZ["uid"], [first, second])
+    await repository.delete_quiz(QUIZ["uid"], third)
+    assert await repository.get_user_quizzes(QUIZ["uid"]) == {}
+    assert await repository.get_quiz_summaries(QUIZ["uid"]) == {}
+    assert await repository.get_quiz(first) is None
+
+
+@pytest.mark.asyncio
+async def test_update_quiz_if_match(repository):
+    """Conditional updates should compare the ETag inside the transaction"""
+    await repository.create_quiz(QUIZ)
+    (quiz_id,) = await repository.get_user_quizzes(QUIZ["uid"])
+    etag = compute_etag(await repository.get_quiz(quiz_id))
+
+    changes = {"title": "Turing"}
+    await repository.update_quiz(quiz_id, changes, {**QUIZ, **changes}, etag)
+    assert (await repository.get_quiz(quiz_id))["title"] == "Turing"
+
+    changes = {"title": "Alan Turing"}
+    with pytest.raises(QuizModifiedError):
+        await repository.update_quiz(
+            quiz_id, changes, {**QUIZ, **changes}, etag
+        )
+    assert (await repository.get_quiz(quiz_id))["title"] == "Turing"
+    with pytest.raises(QuizModifiedError):
+        await repository.update_quiz("unknown", changes, QUIZ, etag)
+
+
+@pytest.mark.asyncio
+async def test_quiz_summaries(repository):
+    """Repository should keep the quiz summaries in sync with the quizzes"""
+    for _ in range(3):
+        await repository.create_quiz(QUIZ)
+    first, second, third = await repository.get_quiz_summaries(QUIZ["uid"])
+
+    summary = (await repository.get_quiz_summaries(QUIZ["uid"]))[first]
+    assert summary["title"] == QUIZ["title"]
+    assert summary["questions_count"] == 1
+    assert "questions" not in summary
+
+    changes = {"title": "Turing"}
+    await repository.update_quiz(first, changes, {**QUIZ, **changes})
+    summaries = await repository.get_quiz_summaries(QUIZ["uid"], limit=2)
+    assert list(summaries) == [first, second]
+    assert summaries[first]["title"] == "Turing"
+    assert list(
+        await repository.get_quiz_summaries(QUIZ["uid"], cursor=second)
+    ) == [third]
+
+    repository.connection.execute("DELETE FROM quiz_summaries")
+    await repository.reindex()
+    assert len(await repository.get_quiz_summaries(QUIZ["uid"])) == 3
@@ -0,0 +1,209 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from firebase_admin import auth
+from google.auth import crypt, jwt
+
+from api.services.http_client import http_client
+from api.services.signing_keys import SigningKeys
+from api.services.token_cache import TokenCache
+from api.utils.id_token import InvalidIdTokenError
+
+PROJECT_ID = "quizly-test"
+
+
+def claims(**kwargs):
+    return {
+        "uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+        "iat": int(time.time()),
+        "exp": int(time.time()) + 3600,
+        **kwargs,
+    }
+
+
+def self_signed_key():
+    """Create a private key and its self-signed certificate"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "test")])
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(datetime.utcnow() - timedelta(days=1))
+        .not_valid_after(datetime.utcnow() + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    pem_key = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    pem_cert = certificate.public_bytes(serialization.Encoding.PEM)
+    return pem_key, pem_cert.decode("ascii")
+
+
+def id_token(pem_key, kid, **kwargs):
+    """Sign a Firebase like ID token"""
+    now = int(time.time())
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+        "iat": now,
+        "exp": now + 3600,
+        **kwargs,
+    }
+    signer = crypt.RSASigner.from_string(pem_key, key_id=kid)
+    return jwt.encode(signer, payload).decode("ascii")
+
+
+@pytest_asyncio.fixture
+async def key_server():
+    """Local stand-in for the Google public certificates endpoint"""
+    pem_key, pem_cert = self_signed_key()
+    state = {"certs": {"key1": pem_cert}, "requests": 0}
+
+    async def certs(request):
+        state["requests"] += 1
+        return web.json_response(
+            state["certs"], headers={"Cache-Control": "public, max-age=3600"}
+        )
+
+    app = web.Application()
+    app.router.add_get("/certs", certs)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    state["url"] = f"http://127.0.0.1:{port}/certs"
+    state["key"] = pem_key
+    yield state
+    await http_client.stop()
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_verify_cached(mocker):
+    """Repeated tokens should be verified only once"""
+    verify_id_token = mocker.patch(
+        "firebase_admin.auth.verify_id_token", return_value=claims()
+    )
+    cache = TokenCache()
+
+    for _ in range(3):
+        result = await cache.verify("token")
+        assert result["uid"] == "XXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    assert verify_id_token.call_count == 1
+    assert cache.stats() == {
+        "size": 1,
+        "hits": 2,
+        "misses": 1,
+        "verifications": 1,
+        "revocation_checks": 0,
+        "failures": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_verify_until_exp(mocker):
+    """Tokens should not be cached past their expiry"""
+    verify_id_token = mocker.patch(
+        "firebase_admin.auth.verify_id_token",
+        return_value=claims(exp=int(time.time()) - 1),
+    )
+    cache = TokenCache()
+
+    await cache.verify("token")
+    await cache.verify("token")
+    assert verify_id_token.call_count == 2
+    assert len(cache.entries) == 0
+
+
+@pytest.mark.asyncio
+async def test_verify_failure(mocker):
+    """Invalid tokens should not be cached"""
+    mocker.patch(
+        "firebase_admin.auth.verify_id_token",
+        side_effect=auth.InvalidIdTokenError("invalid"),
+    )
+    cache = TokenCache()
+
+    with pytest.raises(auth.InvalidIdTokenError):
+        await cache.verify("token")
+    assert cache.stats()["failures"] == 1
+    assert len(cache.entries) == 0
+
+
+@pytest.mark.asyncio
+async def test_verify_revoked(mocker):
+    """Revoked tokens should be dropped at the next revocation check"""
+    mocker.patch("firebase_admin.auth.verify_id_token", return_value=claims())
+    get_user = mocker.patch("firebase_admin.auth.get_user")
+    get_user.return_value.disabled = False
+    get_user.return_value.tokens_valid_after_timestamp = 0
+    cache = TokenCache(check_revoked=True, revocation_interval=3600)
+
+    await cache.verify("token")
+    await cache.verify("token")
+    assert cache.stats()["revocation_checks"] == 1
+
+    cache.revocation_interval = 0
+    get_user.return_value.tokens_valid_after_timestamp = (
+        time.time() + 60
+    ) * 1000
+    with pytest.raises(auth.RevokedIdTokenError):
+        await cache.verify("token")
+    assert len(cache.entries) == 0
+
+
+@pytest.mark.asyncio
+async def test_verify_with_signing_keys(mocker, key_server):
+    """Tokens should be verified against the prefetched keys off the loop"""
+    verify_id_token = mocker.patch("firebase_admin.auth.verify_id_token")
+    signing_keys = SigningKeys(key_server["url"])
+    cache = TokenCache(signing_keys=signing_keys, project_id=PROJECT_ID)
+
+    cache.start()
+    await asyncio.sleep(0.1)
+    assert key_server["requests"] == 1
+    assert 3500 < signing_keys.expires_at - time.monotonic() <= 3600
+
+    token = id_token(key_server["key"], "key1")
+    result = await cache.verify(token)
+    assert result["uid"] == "XXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    assert await cache.verify(token) == result
+    assert cache.stats()["verifications"] == 1
+    verify_id_token.assert_not_called()
+
+    with pytest.raises(InvalidIdTokenError):
+        await cache.verify(id_token(key_server["key"], "key1", aud="other"))
+    await cache.stop()
+    assert key_server["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_signing_keys_rotation(key_server):
+    """Unknown key ids should fetch the keys again, at most once a while"""
+    signing_keys = SigningKeys(key_server["url"], retry_interval=60)
+    cache = TokenCache(signing_keys=signing_keys, project_id=PROJECT_ID)
+
+    pem_key, pem_cert = self_signed_key()
+    key_server["certs"]["key2"] = pem_cert
+    result = await cache.verify(id_token(pem_key, "key2"))
+    assert result["uid"] == "XXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+
+    for _ in range(3):
+        with pytest.raises(InvalidIdTokenError):
+            await cache.verify(id_token(pem_key, "key3"))
+    assert key_server["requests"] == 1
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from api.services.upstream_cache import UpstreamCache
+
+
+class Upstream:
+    """Counting stand-in for the quiz api"""
+
+    def __init__(self):
+        self.calls = 0
+        self.down = False
+
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.down:
+            raise ConnectionError("upstream is down")
+        return {"tags": [f"tag{self.calls}"]}
+
+
+@pytest.mark.asyncio
+async def test_fresh_single_flight():
+    """Concurrent misses should share one fetch"""
+    upstream = Upstream()
+    cache = UpstreamCache(ttl=60, stale_ttl=60)
+
+    results = await asyncio.gather(
+        *(cache.get("tags", upstream.fetch) for _ in range(10))
+    )
+    assert upstream.calls == 1
+    assert len({r.etag for r in results}) == 1
+    assert results[0].body == b'{"tags":["tag1"]}'
+    assert "max-age=60" in results[0].headers["Cache-Control"]
+
+    await cache.get("tags", upstream.fetch)
+    assert upstream.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate(mocker):
+    """Stale bodies should be served while one background refresh runs"""
+    upstream = Upstream()
+    cache = UpstreamCache(ttl=60, stale_ttl=60)
+    monotonic = mocker.patch(
+        "api.services.upstream_cache.monotonic", return_value=100.0
+    )
+    first = await cache.get("tags", upstream.fetch)
+
+    monotonic.return_value = 170.0
+    results = [await cache.get("tags", upstream.fetch) for _ in range(3)]
+    assert all(r is first for r in results)
+    assert cache.stats()["stale_hits"] == 3
+
+    await asyncio.sleep(0.05)
+    assert upstream.calls == 2
+    assert (await cache.get("tags", upstream.fetch)).body == (
+        b'{"tags":["tag2"]}'
+    )
+
+
+@pytest.mark.asyncio
+async def test_expired_upstream_down(mocker):
+    """Expired bodies should be served when the upstream is down"""
+    upstream = Upstream()
+    cache = UpstreamCache(ttl=60, stale_ttl=60)
+    monotonic = mocker.patch(
+        "api.services.upstream_cache.monotonic", return_value=100.0
+    )
+    first = await cache.get("tags", upstream.fetch)
+
+    upstream.down = True
+    monotonic.return_value = 1000.0
+    assert await cache.get("tags", upstream.fetch) is first
+    assert cache.stats()["failures"] == 1
+
+    with pytest.raises(ConnectionError):
+        await cache.get("categories", upstream.fetch)
@@ -10,3 +10,30 @@ def test_help(cli_client, cli):
     assert "--host TEXT" in result.stdout
     assert "--log-level TEXT" in result.stdout
     assert "--reload / --no-reload" in result.stdout
+
+
+def test_reindex(cli_client, cli, mocker):
+    reindex = mocker.patch(
+        "api.services.repository.repository.reindex", new=mocker.Mock()
+    )
+    mocker.patch("asyncio.run")
+    result = cli_client.invoke(cli, ["reindex"])
+    assert result.exit_code == 0
+    reindex.assert_called_once()
+
+
+def test_fake_quiz_api(cli_client, cli, mocker):
+    run = mocker.patch("uvicorn.run")
+    result = cli_client.invoke(
+        cli,
+        ["fake-quiz-api", "--port", "8001", "--latency", "100", "--seed", "1"],
+    )
+    assert result.exit_code == 0
+    app = run.call_args.args[0]
+    assert app.state.fake.latency == 0.1
+    assert run.call_args.kwargs["port"] == 8001
+
+    result = cli_client.invoke(
+        cli, ["fake-quiz-api", "--distribution", "pareto"]
+    )
+    assert result.exit_code != 0
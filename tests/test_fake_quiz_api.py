@@ -0,0 +1,49 @@
+import pytest
+from starlette.testclient import TestClient
+
+from api.fake_quiz_api import FakeQuizApi, create_app
+
+
+def test_fake_quiz_api_endpoints():
+    client = TestClient(create_app(payload_size=100))
+
+    response = client.get("/api/categories")
+    assert response.status_code == 200
+    assert "History" in response.json()
+
+    response = client.get("/api/tags")
+    assert "wine" in response.json()
+
+    response = client.get(
+        "/api/questions?limit=3&categories=music,history&difficulty=hard"
+    )
+    questions = response.json()
+    assert len(questions) == 3
+    assert [q["category"] for q in questions] == ["music", "history", "music"]
+    assert all(q["difficulty"] == "hard" for q in questions)
+    assert len(questions[0]["padding"]) == 100
+    assert (
+        questions[0]["correctAnswer"] not in questions[0]["incorrectAnswers"]
+    )
+
+
+def test_fake_quiz_api_errors():
+    client = TestClient(create_app(error_rate=1.0))
+    assert client.get("/api/tags").status_code == 500
+
+
+@pytest.mark.parametrize(
+    "distribution", ["fixed", "uniform", "normal", "exponential"]
+)
+def test_fake_quiz_api_latency(distribution):
+    first = FakeQuizApi(0.1, 0.05, distribution, seed=1)
+    second = FakeQuizApi(0.1, 0.05, distribution, seed=1)
+    delays = [first.delay() for _ in range(100)]
+    assert delays == [second.delay() for _ in range(100)]
+    assert all(delay >= 0 for delay in delays)
+    assert 0.05 < sum(delays) / len(delays) < 0.15
+
+
+def test_fake_quiz_api_distribution():
+    with pytest.raises(ValueError):
+        FakeQuizApi(distribution="pareto")
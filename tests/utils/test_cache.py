@@ -0,0 +1,41 @@
+from api.utils.cache import TTLCache
+
+
+def test_cache_hit_and_miss():
+    """Cache should count hits and misses"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_cache_expire(mocker):
+    """Cache should drop entries older than ttl"""
+    mocker.patch("api.utils.cache.monotonic", return_value=100.0)
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    mocker.patch("api.utils.cache.monotonic", return_value=110.0)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_evict_least_recently_used():
+    """Cache should evict the least recently used entry when full"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_pop():
+    """Cache should invalidate single entries"""
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.pop("a")
+    cache.pop("b")
+    assert cache.get("a") is None
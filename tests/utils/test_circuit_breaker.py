@@ -0,0 +1,43 @@
+import pytest
+
+from api.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def test_breaker_opens(mocker):
+    mocker.patch("api.utils.circuit_breaker.monotonic", return_value=100.0)
+    breaker = CircuitBreaker(window=4, failure_rate=0.5, min_calls=4)
+    for success in (True, False, True):
+        breaker.allow()
+        breaker.record(success)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["opens"] == 1
+
+
+def test_breaker_half_open(mocker):
+    monotonic = mocker.patch(
+        "api.utils.circuit_breaker.monotonic", return_value=100.0
+    )
+    breaker = CircuitBreaker(min_calls=1, open_timeout=30)
+    breaker.allow()
+    breaker.record(False)
+
+    monotonic.return_value = 131.0
+    breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    monotonic.return_value = 162.0
+    breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.allow()
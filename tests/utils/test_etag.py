@@ -0,0 +1,21 @@
+from api.utils.etag import compute_etag, match_etag
+
+
+def test_compute_etag():
+    """ETag should depend only on the content"""
+    assert compute_etag({"a": 1, "b": [1, 2]}) == compute_etag(
+        {"b": [1, 2], "a": 1}
+    )
+    assert compute_etag({"a": 1}) != compute_etag({"a": 2})
+    assert compute_etag({"a": 1}).startswith('"')
+
+
+def test_match_etag():
+    """ETag should match the header lists and wildcards"""
+    etag = compute_etag({"a": 1})
+    assert match_etag(etag, etag)
+    assert match_etag(f'"other", {etag}', etag)
+    assert match_etag("*", etag)
+    assert not match_etag(None, etag)
+    assert not match_etag(f"W/{etag}", etag)
+    assert match_etag(f"W/{etag}", etag, weak=True)
@@ -0,0 +1,20 @@
+import pytest
+
+from api.utils.id_token import InvalidIdTokenError, decode_id_token, key_id
+
+TOKEN = "eyJhbGciOiJSUzI1NiIsImtpZCI6ImtleTEifQ.e30.c2lnbmF0dXJl"
+
+
+def test_key_id():
+    assert key_id(TOKEN) == "key1"
+    assert key_id("malformed") == ""
+
+
+def test_decode_id_token_malformed():
+    with pytest.raises(InvalidIdTokenError):
+        decode_id_token("malformed", {}, "quizly-test")
+
+
+def test_decode_id_token_unknown_key():
+    with pytest.raises(InvalidIdTokenError):
+        decode_id_token(TOKEN, {}, "quizly-test")
@@ -6,3 +6,30 @@ def test_parse_url(parse_url):
     url = "http://127.0.0.1:8000"
     options = {"a": 5}
     assert parse_url(url, options) == url + "?a=5"
+
+
+def test_parse_url_canonical(parse_url):
+    """
+    The same options should give the same url whatever their order.
+    """
+    url = "http://127.0.0.1:8000/questions"
+    first = parse_url(
+        url, {"limit": 5, "tags": ["wine", "young_adult"], "uid": None}
+    )
+    second = parse_url(url, {"tags": ["wine", "young_adult"], "limit": 5})
+    assert first == second == url + "?limit=5&tags=wine,young_adult"
+    assert parse_url(url, {}) == url
+
+
+def test_parse_url_encoding(parse_url):
+    """
+    Keys and values should be percent-encoded.
+    """
+    url = "http://127.0.0.1:8000/questions"
+    assert (
+        parse_url(url, {"categories": ["arts & literature", "a,b"], "q": "ü"})
+        == url + "?categories=arts%20%26%20literature,a%2Cb&q=%C3%BC"
+    )
+    assert parse_url(url, {"filter": {"a": 1}}) == (
+        url + "?filter=%7B%27a%27%3A%201%7D"
+    )
@@ -0,0 +1,33 @@
+import pytest
+
+from api.utils.projection import parse_fields, project_quiz
+
+QUIZ = {
+    "uid": "XXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+    "title": "The father of the computer",
+    "category": "History",
+    "difficulty": "easy",
+    "questions": [
+        {
+            "question": "Where and when was Alan Turing born?",
+            "correct_answer": "in London in 1912",
+            "incorrect_answers": ["in Manchester in 1901"],
+        }
+    ],
+}
+
+
+def test_parse_fields():
+    assert parse_fields("title, category,title") == ["title", "category"]
+
+
+def test_parse_fields_unknown():
+    with pytest.raises(ValueError):
+        parse_fields("title,answers")
+
+
+def test_project_quiz():
+    assert project_quiz(QUIZ, ["title", "tags", "questions_count"]) == {
+        "title": "The father of the computer",
+        "questions_count": 1,
+    }
@@ -0,0 +1,11 @@
+def test_push_id(mocker):
+    """Push ids should have 20 characters and sort chronologically"""
+    from api.utils.push_id import push_id
+
+    mocker.patch("api.utils.push_id.time", return_value=1000.0)
+    first = push_id()
+    mocker.patch("api.utils.push_id.time", return_value=1000.001)
+    second = push_id()
+
+    assert len(first) == 20
+    assert first < second